@@ -0,0 +1,321 @@
+import logging
+import math
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+from pymilvus import Collection as MilvusCollection
+from pymilvus import CollectionSchema, DataType, FieldSchema, utility
+
+from .collection import Collection
+from .database import Database
+from .rerank import HIGHER_IS_BETTER, as_matrix, exact_distances
+from .utils import (
+    AnnoyIndex,
+    BINFlatIndex,
+    BINIVFIndex,
+    FlatIndex,
+    HNSWINdex,
+    Index,
+    IVFFlatIndex,
+    IVFPQIndex,
+    IVFSQ8Index,
+    MilvusBinaryIndex,
+    MilvusFloatingIndex,
+    batched,
+    milvus_in_expr,
+)
+
+MILVUS_INDEX = MilvusFloatingIndex | MilvusBinaryIndex
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Candidate:
+    index: MILVUS_INDEX
+    search_params: list[dict] = field(default_factory=lambda: [{}])
+
+
+@dataclass
+class IndexReport:
+    index: Index
+    search_param: dict
+    recall: float
+    latency_p50: float
+    latency_p95: float
+    memory: int
+    build_time: float
+
+
+class IndexAdvisor:
+    def __init__(
+        self,
+        database: Database,
+        collection: Collection,
+        field_name: str,
+        metric_type: str = "L2",
+        candidates: list[Candidate] | None = None,
+        queries: list | None = None,
+        sample_size: int = 10000,
+        query_size: int = 100,
+        k: int = 10,
+        min_recall: float = 0.9,
+        batch_size: int = 1000,
+    ) -> None:
+        self.__database = database
+        self.__using = database.get_drivers()[1][0]
+        self.__mongo_collection, self.__milvus_collection = collection.get_drivers()
+        self.__field_name = field_name
+        self.__metric_type = metric_type.upper()
+        self.__candidates = candidates
+        self.__queries = queries
+        self.__sample_size = sample_size
+        self.__query_size = query_size
+        self.__k = k
+        self.__min_recall = min_recall
+        self.__batch_size = batch_size
+        self.failures: list[tuple[Candidate, Exception]] = []
+
+    def run(self) -> list[IndexReport]:
+        vector_field = next(
+            schema_field
+            for schema_field in self.__milvus_collection.schema.fields
+            if schema_field.name == self.__field_name
+        )
+        binary = vector_field.dtype == DataType.BINARY_VECTOR
+        vectors, queries = self.__sample()
+        if not vectors or not queries:
+            return []
+
+        # Ground truth comes from an exact scan of the very same sample
+        distances = exact_distances(
+            self.__metric_type,
+            as_matrix(queries, binary),
+            as_matrix(vectors, binary),
+        )
+        if self.__metric_type in HIGHER_IS_BETTER:
+            distances = -distances
+        k = min(self.__k, len(vectors))
+        truth = [set(row[:k]) for row in np.argsort(distances, axis=1).tolist()]
+
+        candidates = self.__candidates or default_candidates(
+            self.__field_name, self.__metric_type, binary, vector_field.params["dim"]
+        )
+        name = f"{self.__milvus_collection.name}_advisor_{int(time.time())}"
+        scratch = self.__create_scratch(name, vector_field, vectors)
+        try:
+            reports = []
+            self.failures = []
+            for candidate in candidates:
+                # One index the server rejects must not sink the whole run
+                try:
+                    reports.extend(
+                        self.__evaluate(scratch, candidate, queries, truth, k)
+                    )
+                except Exception as e:
+                    logger.exception("Index candidate %s failed", candidate.index)
+                    self.failures.append((candidate, e))
+        finally:
+            self.__database.delete_collection(name)
+
+        # Candidates meeting the recall target rank by speed, then by memory,
+        # and the ones missing it trail behind by how close they got
+        return sorted(
+            reports,
+            key=lambda report: (
+                report.recall < self.__min_recall,
+                report.latency_p95 if report.recall >= self.__min_recall else 0.0,
+                -report.recall,
+                report.memory,
+            ),
+        )
+
+    def __sample(self) -> tuple[list, list]:
+        # A limited milvus query returns whatever rows come first, usually
+        # the oldest segments. $sample picks documents at random instead.
+        size = self.__sample_size + (0 if self.__queries else self.__query_size)
+        milvus_ids = [
+            document["milvus_id"]
+            for document in self.__mongo_collection.aggregate(
+                [
+                    {"$match": {"milvus_id": {"$ne": None}}},
+                    {"$sample": {"size": size}},
+                    {"$project": {"_id": False, "milvus_id": True}},
+                ],
+                allowDiskUse=True,
+            )
+        ]
+
+        pk_name = self.__milvus_collection.schema.primary_field.name
+        records = []
+        for chunk in batched(milvus_ids, self.__batch_size):
+            records.extend(
+                self.__milvus_collection.query(
+                    milvus_in_expr(pk_name, chunk), output_fields=[self.__field_name]
+                )
+            )
+        # Binary vectors come back wrapped in a single element list
+        vectors = [
+            (
+                vector[0]
+                if isinstance(vector, list) and isinstance(vector[0], bytes)
+                else vector
+            )
+            for vector in (record[self.__field_name] for record in records)
+        ]
+        if self.__queries is not None:
+            return vectors, self.__queries
+
+        # Hold the queries out so they never match themselves at distance zero
+        return vectors[self.__query_size :], vectors[: self.__query_size]
+
+    def __create_scratch(
+        self, name: str, vector_field: FieldSchema, vectors: list
+    ) -> MilvusCollection:
+        schema = CollectionSchema(
+            [
+                FieldSchema("pk", DataType.INT64, is_primary=True),
+                FieldSchema(
+                    self.__field_name,
+                    vector_field.dtype,
+                    dim=vector_field.params["dim"],
+                ),
+            ]
+        )
+        self.__database.create_collection(name, {"fields": schema})
+
+        scratch = MilvusCollection(name, using=self.__using)
+        for offset, chunk in enumerate(batched(vectors, self.__batch_size)):
+            start = offset * self.__batch_size
+            scratch.insert([list(range(start, start + len(chunk))), chunk])
+        scratch.flush()
+
+        return scratch
+
+    def __evaluate(
+        self,
+        scratch: MilvusCollection,
+        candidate: Candidate,
+        queries: list,
+        truth: list[set],
+        k: int,
+    ) -> list[IndexReport]:
+        index = Index(mongo_index=None, milvus_indexes=[candidate.index])
+        index_params = {
+            "metric_type": candidate.index.metric_type,
+            "index_type": candidate.index.index_type.name,
+            "params": {
+                key: value
+                for key, value in vars(candidate.index.index_type).items()
+                if key != "name"
+            },
+        }
+
+        started = time.perf_counter()
+        scratch.create_index(self.__field_name, index_params)
+        build_time = time.perf_counter() - started
+
+        try:
+            scratch.load()
+            memory = sum(
+                segment.mem_size
+                for segment in utility.get_query_segment_info(
+                    scratch.name, using=self.__using
+                )
+            )
+
+            reports = []
+            for search_param in candidate.search_params:
+                search_param = {"metric_type": self.__metric_type, **search_param}
+                latencies, found = [], 0
+                for query, expected in zip(queries, truth):
+                    started = time.perf_counter()
+                    result = scratch.search(
+                        [query], self.__field_name, search_param, limit=k
+                    )
+                    latencies.append(time.perf_counter() - started)
+                    found += len(expected.intersection(result[0].ids))
+
+                latencies.sort()
+                reports.append(
+                    IndexReport(
+                        index=index,
+                        search_param=search_param,
+                        recall=found / (k * len(queries)),
+                        latency_p50=_percentile(latencies, 50),
+                        latency_p95=_percentile(latencies, 95),
+                        memory=memory,
+                        build_time=build_time,
+                    )
+                )
+        finally:
+            scratch.release()
+            scratch.drop_index()
+
+        return reports
+
+
+def default_candidates(
+    field_name: str, metric_type: str, binary: bool, dim: int
+) -> list[Candidate]:
+    if binary:
+        return [
+            Candidate(MilvusBinaryIndex(field_name, metric_type, BINFlatIndex())),
+            *(
+                Candidate(
+                    MilvusBinaryIndex(field_name, metric_type, BINIVFIndex(nlist)),
+                    [{"params": {"nprobe": nprobe}} for nprobe in (8, 32, 128)],
+                )
+                for nlist in (256, 1024)
+            ),
+        ]
+
+    nprobes = [{"params": {"nprobe": nprobe}} for nprobe in (8, 32, 128)]
+    candidates = [Candidate(MilvusFloatingIndex(field_name, metric_type, FlatIndex()))]
+    for nlist in (256, 1024, 4096):
+        candidates.append(
+            Candidate(
+                MilvusFloatingIndex(field_name, metric_type, IVFFlatIndex(nlist)),
+                nprobes,
+            )
+        )
+        candidates.append(
+            Candidate(
+                MilvusFloatingIndex(field_name, metric_type, IVFSQ8Index(nlist)),
+                nprobes,
+            )
+        )
+    # PQ needs the number of sub-quantizers to divide the dimension
+    for m in (dim // 4, dim // 8):
+        if m and dim % m == 0:
+            candidates.append(
+                Candidate(
+                    MilvusFloatingIndex(
+                        field_name, metric_type, IVFPQIndex(1024, m=m, nbits=8)
+                    ),
+                    nprobes,
+                )
+            )
+    for M in (8, 16, 32):
+        candidates.append(
+            Candidate(
+                MilvusFloatingIndex(field_name, metric_type, HNSWINdex(M, 200)),
+                [{"params": {"ef": ef}} for ef in (32, 64, 128)],
+            )
+        )
+    for n_trees in (8, 32):
+        candidates.append(
+            Candidate(
+                MilvusFloatingIndex(field_name, metric_type, AnnoyIndex(n_trees)),
+                [{"params": {"search_k": search_k}} for search_k in (-1, 1000)],
+            )
+        )
+
+    return candidates
+
+
+def _percentile(values: list[float], percentile: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(math.ceil(len(values) * percentile / 100), len(values)) - 1]
@@ -0,0 +1,291 @@
+import logging
+import math
+import threading
+from collections import deque
+from dataclasses import dataclass
+
+from pymilvus import Collection as MilvusCollection
+
+from .forking import track
+
+SEARCH_KNOBS = {
+    "IVF_FLAT": "nprobe",
+    "IVF_SQ8": "nprobe",
+    "IVF_PQ": "nprobe",
+    "BIN_IVF_FLAT": "nprobe",
+    "HNSW": "ef",
+    "ANNOY": "search_k",
+}
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class AutotuneMetrics:
+    knob: str | None = None
+    value: int = 0
+    latency_p95: float = 0.0
+    recall: float | None = None
+    searches: int = 0
+    recall_samples: int = 0
+    increases: int = 0
+    decreases: int = 0
+    last_decision: str | None = None
+
+
+class SearchAutotuner:
+    def __init__(
+        self,
+        target_latency: float | None = None,
+        min_recall: float | None = None,
+        initial: int = 16,
+        minimum: int = 1,
+        maximum: int = 1024,
+        step: int = 4,
+        backoff: float = 0.7,
+        headroom: float = 0.8,
+        window: int = 200,
+        adjust_every: int = 50,
+        recall_interval: float = 30.0,
+    ) -> None:
+        if target_latency is None and min_recall is None:
+            raise ValueError("Autotuner needs a latency target or a minimum recall")
+
+        self.__target_latency = target_latency
+        self.__min_recall = min_recall
+        self.__initial = initial
+        self.__minimum = minimum
+        self.__maximum = maximum
+        self.__step = step
+        self.__backoff = backoff
+        self.__headroom = headroom
+        self.__window = window
+        self.__adjust_every = adjust_every
+        self.__recall_interval = recall_interval
+        self.__lock = threading.Lock()
+        self.__fields: dict[tuple[str, str], _FieldState] = {}
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+        track(self)
+
+    def tune(
+        self,
+        milvus_collection: MilvusCollection,
+        field_name: str,
+        search_param: dict | None,
+        limit: int,
+    ) -> dict | None:
+        state = self.__state(milvus_collection, field_name)
+        if state.metrics.knob is None:
+            return search_param
+
+        value = state.metrics.value
+        if state.metrics.knob in ("ef", "search_k"):
+            # HNSW and ANNOY reject a setting smaller than the number of results
+            value = max(value, limit)
+
+        search_param = dict(search_param or {})
+        search_param["params"] = {
+            **search_param.get("params", {}),
+            state.metrics.knob: value,
+        }
+        return search_param
+
+    def observe(
+        self,
+        milvus_collection: MilvusCollection,
+        field_name: str,
+        search_param: dict | None,
+        query: list,
+        ids: list,
+        latency: float,
+    ) -> None:
+        state = self.__state(milvus_collection, field_name)
+        if state.metrics.knob is None:
+            return
+
+        with self.__lock:
+            state.latencies.append(latency)
+            state.metrics.searches += 1
+            # Keep the latest query around to estimate recall with later on
+            state.sample = (
+                milvus_collection,
+                search_param,
+                query,
+                ids,
+                state.metrics.value,
+            )
+            if state.metrics.searches % self.__adjust_every == 0:
+                self.__adjust((milvus_collection.name, field_name), state)
+
+        self.__ensure_sampler()
+
+    def metrics(self) -> dict[tuple[str, str], AutotuneMetrics]:
+        with self.__lock:
+            return {
+                key: AutotuneMetrics(**vars(state.metrics))
+                for key, state in self.__fields.items()
+            }
+
+    def close(self) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join()
+
+    def _after_fork(self) -> None:
+        # The sampler is started again by the first search in the child
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+
+    def __state(
+        self, milvus_collection: MilvusCollection, field_name: str
+    ) -> "_FieldState":
+        # Fields of the same name in other collections are tuned apart
+        key = (milvus_collection.name, field_name)
+        with self.__lock:
+            state = self.__fields.get(key)
+            if state is not None:
+                return state
+
+        knob = None
+        for index in milvus_collection.indexes:
+            if index.field_name == field_name:
+                knob = SEARCH_KNOBS.get(index.params.get("index_type"))
+
+        with self.__lock:
+            return self.__fields.setdefault(
+                key,
+                _FieldState(
+                    metrics=AutotuneMetrics(knob=knob, value=self.__initial),
+                    latencies=deque(maxlen=self.__window),
+                ),
+            )
+
+    def __adjust(self, key: tuple[str, str], state: "_FieldState") -> None:
+        metrics = state.metrics
+        latencies = sorted(state.latencies)
+        metrics.latency_p95 = latencies[
+            min(math.ceil(len(latencies) * 0.95), len(latencies)) - 1
+        ]
+
+        # Additive increase while there is slack, multiplicative decrease as
+        # soon as the latency target is missed. Missing the recall floor
+        # overrides the latency target. A recall estimate only drives a
+        # single decision, the next one waits for a sample of the new value.
+        value = metrics.value
+        recall = metrics.recall if state.fresh_recall else None
+        if self.__min_recall is not None and (
+            recall is not None and recall < self.__min_recall
+        ):
+            value, decision = value + self.__step, "recall below target"
+        elif self.__min_recall is not None and (
+            metrics.recall is not None and metrics.recall < self.__min_recall
+        ):
+            # Still short on recall as far as we know, hold until it is measured
+            return
+        elif (
+            self.__target_latency is not None
+            and metrics.latency_p95 > self.__target_latency
+        ):
+            value, decision = int(value * self.__backoff), "latency above target"
+        elif self.__target_latency is None:
+            if recall is None:
+                return
+            if recall < min(1.0, self.__min_recall + 0.02):
+                return
+            value, decision = value - self.__step, "recall above target"
+        elif metrics.latency_p95 < self.__target_latency * self.__headroom:
+            value, decision = value + self.__step, "latency below target"
+        else:
+            return
+
+        value = max(self.__minimum, min(self.__maximum, value))
+        if value == metrics.value:
+            return
+
+        if value > metrics.value:
+            metrics.increases += 1
+        else:
+            metrics.decreases += 1
+        logger.debug(
+            "Autotuner moved %s.%s %s from %d to %d: %s",
+            *key,
+            metrics.knob,
+            metrics.value,
+            value,
+            decision,
+        )
+        metrics.value = value
+        metrics.last_decision = decision
+        state.fresh_recall = False
+
+    def __ensure_sampler(self) -> None:
+        if self.__min_recall is None or self.__thread is not None:
+            return
+
+        with self.__lock:
+            if self.__thread is None:
+                self.__thread = threading.Thread(
+                    target=self.__sample_recall, daemon=True
+                )
+                self.__thread.start()
+
+    def __sample_recall(self) -> None:
+        while not self.__stop.wait(self.__recall_interval):
+            with self.__lock:
+                samples = [
+                    (key, state, state.sample)
+                    for key, state in self.__fields.items()
+                    if state.sample is not None
+                ]
+                for _, state, _ in samples:
+                    state.sample = None
+
+            for (_, field_name), state, sample in samples:
+                milvus_collection, search_param, query, ids, value = sample
+                if not ids:
+                    continue
+
+                # The most thorough setting stands in for an exact search
+                thorough = self.__maximum
+                if state.metrics.knob == "ef":
+                    thorough = max(thorough, len(ids))
+                elif state.metrics.knob == "search_k":
+                    # ANNOY searches every tree exhaustively with -1
+                    thorough = -1
+                search_param = dict(search_param or {})
+                search_param["params"] = {
+                    **search_param.get("params", {}),
+                    state.metrics.knob: thorough,
+                }
+                try:
+                    result = milvus_collection.search(
+                        [query], field_name, search_param, limit=len(ids)
+                    )
+                except Exception:
+                    logger.exception("Recall sample for %s failed", field_name)
+                    continue
+
+                recall = len(set(ids).intersection(result[0].ids)) / len(ids)
+                with self.__lock:
+                    metrics = state.metrics
+                    if metrics.value != value:
+                        # The knob moved since, this says nothing about it
+                        continue
+
+                    state.fresh_recall = True
+                    metrics.recall_samples += 1
+                    if metrics.recall is None:
+                        metrics.recall = recall
+                    else:
+                        # Smooth the single-query estimates into a running one
+                        metrics.recall = 0.8 * metrics.recall + 0.2 * recall
+
+
+@dataclass
+class _FieldState:
+    metrics: AutotuneMetrics
+    latencies: deque
+    sample: tuple | None = None
+    fresh_recall: bool = False
@@ -0,0 +1,130 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+
+from .forking import track
+
+_CLOSE = object()
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        handler: Callable[[list], list],
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+    ) -> None:
+        self.__handler = handler
+        self.__max_batch_size = max_batch_size
+        self.__max_wait = max_wait
+        self.__queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.__lock = threading.Lock()
+        self.__thread: threading.Thread | None = None
+        self.__closed = False
+        track(self)
+
+    def submit(self, item: Any) -> Future:
+        future = Future()
+        with self.__lock:
+            if self.__closed:
+                raise RuntimeError("Batcher is closed")
+            if self.__thread is None:
+                self.__thread = threading.Thread(target=self.__run, daemon=True)
+                self.__thread.start()
+            self.__queue.put((item, future))
+
+        return future
+
+    def close(self) -> None:
+        with self.__lock:
+            if self.__closed:
+                return
+            self.__closed = True
+            thread = self.__thread
+
+        self.__queue.put(_CLOSE)
+        if thread is not None:
+            thread.join()
+
+    def _after_fork(self) -> None:
+        # Items queued in the parent are the parent's to flush
+        self.__queue = queue.SimpleQueue()
+        self.__lock = threading.Lock()
+        self.__thread = None
+
+    def __run(self) -> None:
+        while True:
+            entry = self.__queue.get()
+            if entry is _CLOSE:
+                return
+
+            batch = [entry]
+            closing = False
+            deadline = time.monotonic() + self.__max_wait
+            while len(batch) < self.__max_batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    entry = self.__queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if entry is _CLOSE:
+                    closing = True
+                    break
+                batch.append(entry)
+
+            self.__flush(batch)
+            if closing:
+                return
+
+    def __flush(self, batch: list[tuple[Any, Future]]) -> None:
+        futures = [future for _, future in batch]
+        try:
+            results = self.__handler([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Batch handler returned {len(results)} results "
+                    f"for {len(batch)} items"
+                )
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        for future, result in zip(futures, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+
+@dataclass
+class GroupCommit:
+    max_batch_size: int = 64
+    max_wait: float = 0.002
+    batchers: dict[Hashable, MicroBatcher] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def batcher(self, key: Hashable, handler: Callable[[list], list]) -> MicroBatcher:
+        # Collections writing to the same stores share one batcher, no matter
+        # how many times they were looked up
+        with self.lock:
+            if key not in self.batchers:
+                self.batchers[key] = MicroBatcher(
+                    handler, self.max_batch_size, self.max_wait
+                )
+            return self.batchers[key]
+
+    def close(self) -> None:
+        with self.lock:
+            batchers = list(self.batchers.values())
+            self.batchers.clear()
+
+        for batcher in batchers:
+            batcher.close()
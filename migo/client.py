@@ -1,10 +1,42 @@
 import logging
+import os
+import threading
 from typing import Sequence
 from pymongo import MongoClient
-from pymilvus import connections, Connections
+from pymilvus import connections, Connections, DefaultConfig
 
 from .config import MongoConfig, MilvusConfig
 from .database import Database
+from .forking import on_fork, track
+
+_FORK_LOCK = threading.RLock()
+
+
+class _ReconnectingAliases(dict):
+    # Stands in for the connected aliases of pymilvus in a forked child. The
+    # first lookup of an alias the parent had connected opens a new channel,
+    # so handles made before the fork keep working without going through a
+    # Client.
+    def __init__(self) -> None:
+        super().__init__()
+        self.configs: dict[str, dict] = {}
+
+    def get(self, alias, default=None):
+        if alias not in self and alias in self.configs:
+            with _FORK_LOCK:
+                if alias not in self:
+                    connections.connect(**self.configs[alias])
+        return super().get(alias, default)
+
+
+@on_fork
+def _reset_connections() -> None:
+    global _FORK_LOCK
+    # Whatever the parent held at fork time is meaningless here
+    _FORK_LOCK = threading.RLock()
+    # The gRPC channels belong to the parent, forget them without closing so
+    # the parent's connections are left untouched
+    connections._connected_alias = _ReconnectingAliases()
 
 
 class Client:
@@ -20,18 +52,44 @@ class Client:
 
         mongo_config["connect"] = True
 
-        self.__mongo_client = MongoClient(**mongo_config)
+        self.__mongo_config = mongo_config
+        self.__milvus_config = milvus_config
+        self.__connect()
+        track(self)
+
+    def __connect(self) -> None:
+        self.__pid = os.getpid()
+        self.__mongo_client = MongoClient(**self.__mongo_config)
 
         try:
-            connections.connect(**milvus_config)
+            connections.connect(**self.__milvus_config)
         except Exception as e:
             self.__mongo_client.close()
             raise e
 
+    def __ensure_process(self) -> None:
+        # Reconnect lazily, a forked worker may never touch this client
+        if self.__pid == os.getpid():
+            return
+
+        with _FORK_LOCK:
+            if self.__pid != os.getpid():
+                self.__connect()
+
+    def _after_fork(self) -> None:
+        # MongoClient is not fork safe either, drop the inherited one unclosed
+        self.__mongo_client = None
+        self.__pid = None
+        if isinstance(connections._connected_alias, _ReconnectingAliases):
+            alias = self.__milvus_config.get("alias", DefaultConfig.DEFAULT_USING)
+            connections._connected_alias.configs[alias] = self.__milvus_config
+
     def get_drivers(self) -> tuple[MongoClient, Connections]:
+        self.__ensure_process()
         return (self.__mongo_client, connections)
 
     def get_databases(self) -> Sequence[Database]:
+        self.__ensure_process()
         databases = []
 
         mongo_databases = {name for name in self.__mongo_client.list_database_names()}
@@ -54,6 +112,7 @@ class Client:
         return databases
 
     def get_database(self, name: str) -> Database:
+        self.__ensure_process()
         milvus_databases = {
             name: client for name, client in connections.list_connections()
         }
@@ -66,6 +125,7 @@ class Client:
         )
 
     def get_default_database(self) -> Database:
+        self.__ensure_process()
         milvus_databases = connections.list_connections()
         if not milvus_databases:
             raise ValueError("Milvus has no open connections")
@@ -80,6 +140,7 @@ class Client:
         )
 
     def drop_database(self, name: str) -> None:
+        self.__ensure_process()
         milvus_databases = {
             name: client for name, client in connections.list_connections()
         }
@@ -102,6 +163,10 @@ class Client:
             raise Exception(errors)
 
     def close(self) -> None:
+        if self.__pid != os.getpid():
+            # Nothing has been opened by this process yet
+            return
+
         errors = []
         for alias, conn in connections.list_connections():
             if conn is not None:
@@ -1,8 +1,22 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import asdict
-from typing import Any
+from pathlib import Path
+from typing import Any, Callable, Iterable
 
+import pymongo
+from bson import ObjectId
 from pymilvus import Collection as MilvusCollection
+from pymilvus import DataType
 from pymongo.collection import Collection as MongoCollection
+from pymongo.errors import (
+    BulkWriteError,
+    DuplicateKeyError,
+    WriteConcernError,
+    WriteError,
+)
 from pymongo.results import (
     DeleteResult,
     InsertManyResult,
@@ -10,12 +24,76 @@ from pymongo.results import (
     UpdateResult,
 )
 
-from .utils import BatchDocument, Document, DropIndex, Field, Filter, Index, copy_sig
+from .autotune import SearchAutotuner
+from .batching import GroupCommit
+from .deadline import Deadline, deadline_stage
+from .embedding import EMBEDDING_FUNCTION, Embedder
+from .export import export_collection, import_collection
+from .forking import on_fork
+from .fusion import Fusion, fuse
+from .hedging import HedgedSearch
+from .identity import id_from_pk, identity_pk_type, pk_columns, pk_from_id
+from .pagination import (
+    MAX_TOPK,
+    CursorCache,
+    CursorState,
+    Page,
+    rank_order,
+    with_offset,
+)
+from .profile import (
+    HIT_BYTES,
+    Profiler,
+    QueryPlan,
+    bson_size,
+    mongo_round_trips,
+    profiled,
+    stage,
+    vector_size,
+)
+from .rawbson import RAW_CODEC_OPTIONS, attach, milvus_id_of
+from .rerank import ExactHit, as_matrix, rerank
+from .singleflight import SingleFlight, request_key
+from .utils import (
+    BatchDocument,
+    Document,
+    DropIndex,
+    Field,
+    Filter,
+    Index,
+    copy_sig,
+    milvus_in_expr,
+)
 
 EMPTY_UPDATE = UpdateResult(
     acknowledged=True, raw_result={"nModified": 0, "n": 0, "upserted": None}
 )
 EMPTY_DELETE = DeleteResult(acknowledged=True, raw_result={"n": 0})
+_EXECUTORS: dict[str, ThreadPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def _executor(name: str) -> ThreadPoolExecutor:
+    executor = _EXECUTORS.get(name)
+    if executor is not None:
+        return executor
+
+    with _EXECUTORS_LOCK:
+        if name not in _EXECUTORS:
+            _EXECUTORS[name] = ThreadPoolExecutor(thread_name_prefix=f"migo-{name}")
+        return _EXECUTORS[name]
+
+
+@on_fork
+def _reset_executors() -> None:
+    global _EXECUTORS_LOCK
+    # The pool threads stayed behind in the parent, start new ones on demand
+    _EXECUTORS.clear()
+    _EXECUTORS_LOCK = threading.Lock()
+
+
+def _supplies_id(group: list[Document]) -> bool:
+    return any("_id" in data.mongo_document for data in group)
 
 
 class Collection:
@@ -23,15 +101,60 @@ class Collection:
         self,
         mongo_collection: MongoCollection,
         milvus_collection: MilvusCollection | None,
+        embedder: Embedder | EMBEDDING_FUNCTION | None = None,
+        hedging: HedgedSearch | None = None,
+        coalescing: SingleFlight | None = None,
+        autotuner: SearchAutotuner | None = None,
+        cursor_cache: CursorCache | None = None,
+        group_commit: GroupCommit | None = None,
+        identity_keys: bool = False,
     ) -> None:
         self.__mongo_collection = mongo_collection
         self.__milvus_collection = milvus_collection
+        # A shared Embedder is left to its owner, one wrapped here is ours
+        self.__owns_embedder = embedder is not None and not isinstance(
+            embedder, Embedder
+        )
+        if self.__owns_embedder:
+            embedder = Embedder(embedder)
+        self.__embedder = embedder
+        self.__hedging = hedging
+        self.__coalescing = coalescing
+        self.__autotuner = autotuner
+        self.__cursors = cursor_cache or CursorCache()
+        self.__identity_keys = identity_keys
+        self.__pk_type = None
+        if identity_keys:
+            # Checked once here, a mismatch would otherwise make every join
+            # come back empty instead of failing
+            if milvus_collection is None:
+                raise ValueError("Identity keys need a milvus collection")
+            self.__pk_type = identity_pk_type(milvus_collection.schema)
+        self.__insert_batcher = None
+        if group_commit is not None:
+            self.__insert_batcher = group_commit.batcher(
+                (
+                    mongo_collection.full_name,
+                    None if milvus_collection is None else milvus_collection.name,
+                    identity_keys,
+                ),
+                self.__commit_inserts,
+            )
 
     def get_drivers(self) -> tuple[MongoCollection, MilvusCollection | None]:
         return (self.__mongo_collection, self.__milvus_collection)
 
+    @property
+    def identity_keys(self) -> bool:
+        return self.__identity_keys
+
+    def close(self) -> None:
+        if self.__owns_embedder:
+            self.__embedder.close()
+
     # =========== Unified interface ===========
 
+    @profiled
     def find_one(
         self,
         filter: Filter | None = None,
@@ -39,18 +162,28 @@ class Collection:
         fields: list[Field] | None = None,
         search_param: dict | None = None,
         partition_names: list[str] | None = None,
+        rerank_factor: int | None = None,
+        fusion: Fusion | None = None,
+        raw: bool = False,
+        timeout: float | None = None,
+        profiler: Profiler | None = None,
     ) -> dict:
-        if filter and filter.milvus_filter:
-            milvus_filter = filter.milvus_filter
-
-            name = next(milvus_filter.keys())
-            milvus_filter = {name: [milvus_filter[name]]}
-
         documents = self.find_many(
-            filter, sort, fields, search_param, partition_names, limit=1
+            filter,
+            sort,
+            fields,
+            search_param,
+            partition_names,
+            limit=1,
+            rerank_factor=rerank_factor,
+            fusion=fusion,
+            raw=raw,
+            timeout=timeout,
+            profiler=profiler,
         )
         return None if not documents else documents[0]
 
+    @profiled
     def find_many(
         self,
         filter: Filter | None = None,
@@ -59,71 +192,172 @@ class Collection:
         search_param: dict | None = None,
         partition_names: list[str] | None = None,
         limit: int = 0,
+        rerank_factor: int | None = None,
+        fusion: Fusion | None = None,
+        raw: bool = False,
+        timeout: float | None = None,
+        profiler: Profiler | None = None,
     ) -> list[dict]:
-        mongo_filter, milvus_filter = None, None
-        if filter is not None:
-            mongo_filter = filter.mongo_filter
-            milvus_filter = filter.milvus_filter
+        args = (
+            filter,
+            sort,
+            fields,
+            search_param,
+            partition_names,
+            limit,
+            rerank_factor,
+            fusion,
+            raw,
+        )
+        if self.__coalescing is None or profiler is not None:
+            return self.__find_many(*args, timeout, profiler)
+
+        return self.__coalescing.do(
+            # Only callers with the same timeout share a call, so nobody gets
+            # less time than they asked for
+            request_key(*args, timeout),
+            lambda: self.__find_many(*args, timeout, None),
+            timeout,
+        )
 
-        milvus_ids = {}
-        if milvus_filter is not None:
-            # Query milvus by vector similarity
-            milvus_fields = [field.milvus_field for field in fields] if fields else None
+    async def find_many_async(
+        self,
+        filter: Filter | None = None,
+        sort: list[tuple[str, str | int]] | None = None,
+        fields: list[Field] | None = None,
+        search_param: dict | None = None,
+        partition_names: list[str] | None = None,
+        limit: int = 0,
+        rerank_factor: int | None = None,
+        fusion: Fusion | None = None,
+        raw: bool = False,
+        timeout: float | None = None,
+    ) -> list[dict]:
+        args = (
+            filter,
+            sort,
+            fields,
+            search_param,
+            partition_names,
+            limit,
+            rerank_factor,
+            fusion,
+            raw,
+        )
+        if self.__coalescing is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, lambda: self.__find_many(*args, timeout, None)
+            )
 
-            field_name = next(milvus_filter.keys())
-            field_value = milvus_filter[field_name]
-            milvus_results = self.__milvus_collection.search(
-                data=field_value,
-                output_fields=milvus_fields,
-                anns_field=field_name,
-                param=search_param,
+        return await self.__coalescing.do_async(
+            # Only callers with the same timeout share a call, so nobody gets
+            # less time than they asked for
+            request_key(*args, timeout),
+            lambda: self.__find_many(*args, timeout, None),
+            timeout,
+        )
+
+    @profiled
+    def find_page(
+        self,
+        filter: Filter | None = None,
+        fields: list[Field] | None = None,
+        search_param: dict | None = None,
+        partition_names: list[str] | None = None,
+        page_size: int = 10,
+        cursor: str | None = None,
+        timeout: float | None = None,
+        profiler: Profiler | None = None,
+    ) -> Page:
+        deadline = None if timeout is None else Deadline(timeout)
+        if cursor is not None:
+            state, position = self.__cursors.get(cursor)
+        else:
+            filter = self.__resolve_filter(filter)
+            if filter is None or not filter.milvus_filter:
+                raise ValueError("Pagination needs a vector filter")
+            if len(filter.milvus_filter) != 1:
+                raise ValueError("Pagination supports a single vector field")
+
+            field_name, field_value = next(iter(filter.milvus_filter.items()))
+            if len(field_value) != 1:
+                raise ValueError("Pagination supports a single query vector")
+
+            state = CursorState(
+                field_name=field_name,
+                query=field_value,
+                mongo_filter=dict(filter.mongo_filter or {}),
+                fields=fields,
+                search_param=search_param,
                 partition_names=partition_names,
-                limit=limit,
+                page_size=page_size,
             )
-            for result in milvus_results:
-                for hit in result:
-                    milvus_ids[hit.id] = hit
-
-        if mongo_filter is None:
-            mongo_filter = {}
+            position = 0
 
-        if milvus_ids:
-            mongo_filter["milvus_id"] = {"$in": list(milvus_ids.keys())}
+        documents = []
+        while len(documents) < state.page_size:
+            # Candidates dropped by the mongo filter are made up for with the
+            # next slice, so a page is only short once the search runs dry
+            needed = state.page_size - len(documents)
+            if position + needed > len(state.hits):
+                self.__extend_hits(state, position + needed, deadline, profiler)
 
-        mongo_fields = {field.mongo_field: True for field in fields} if fields else None
-        mongo_results = self.__mongo_collection.find(
-            mongo_filter, sort, projection=mongo_fields, limit=limit
-        )
+            hits = state.hits[position : position + needed]
+            if not hits:
+                break
 
-        final_results = []
-        pending_results = {}
-        for result in mongo_results:
-            milvus_id = result.get("milvus_id", None)
-            if milvus_id in milvus_ids:
-                result["milvus_data"] = milvus_ids[milvus_id]
-                final_results.append(result)
-            elif milvus_id is not None:
-                pending_results[milvus_id] = result
+            position += len(hits)
+            documents.extend(self.__hydrate_page(state, hits, deadline, profiler))
 
-        if pending_results:
-            # Query milvus by mongo's primary keys if needed
+        if state.exhausted and position >= len(state.hits):
+            return Page(documents)
 
-            milvus_results = self.__milvus_collection.query(
-                f"pk in {list(pending_results.keys())}"
-            )
-            for result in milvus_results:
-                for hit in result:
-                    mongo_result = pending_results[hit.id]
-                    mongo_result["milvus_data"] = hit
-                    final_results.append(mongo_result)
+        return Page(documents, self.__cursors.put(state, position))
 
-        return final_results
+    def explain(
+        self,
+        filter: Filter | None = None,
+        sort: list[tuple[str, str | int]] | None = None,
+        fields: list[Field] | None = None,
+        search_param: dict | None = None,
+        partition_names: list[str] | None = None,
+        limit: int = 0,
+        rerank_factor: int | None = None,
+        fusion: Fusion | None = None,
+        raw: bool = False,
+    ) -> QueryPlan:
+        profiler = Profiler("find_many", explain=True)
+        self.find_many(
+            filter,
+            sort,
+            fields,
+            search_param,
+            partition_names,
+            limit,
+            rerank_factor,
+            fusion,
+            raw,
+            profiler=profiler,
+        )
+        return profiler.finish()
 
     def insert_one(
         self,
         data: Document,
         partition_name: str | None = None,
     ) -> InsertOneResult:
+        self.__resolve_document(data)
+        if self.__insert_batcher is not None:
+            return self.__insert_batcher.submit((data, partition_name)).result()
+
+        if self.__identity_keys:
+            return self.__insert_identity(
+                [data],
+                partition_name,
+                lambda: self.__mongo_collection.insert_one(data.mongo_document),
+            )
+
         if data.milvus_array is not None:
             result = self.__milvus_collection.insert(
                 [data.milvus_array], partition_name
@@ -133,6 +367,22 @@ class Collection:
         return self.__mongo_collection.insert_one(data.mongo_document)
 
     def insert_many(self, data: BatchDocument, partition_name) -> InsertManyResult:
+        if data.milvus_arrays is None and data.contents is not None:
+            data.milvus_arrays = [self.__embed(data.contents)]
+
+        if self.__identity_keys:
+            rows = [None] * len(data.mongo_documents)
+            if data.milvus_arrays is not None:
+                rows = [list(row) for row in zip(*data.milvus_arrays)]
+            return self.__insert_identity(
+                [
+                    Document(document, row)
+                    for document, row in zip(data.mongo_documents, rows)
+                ],
+                partition_name,
+                lambda: self.__mongo_collection.insert_many(data.mongo_documents),
+            )
+
         if data.milvus_arrays is not None:
             result = self.__milvus_collection.insert(data.milvus_arrays, partition_name)
             for document, milvus_pk in zip(data.mongo_documents, result.primary_keys):
@@ -140,6 +390,7 @@ class Collection:
 
         return self.__mongo_collection.insert_many(data.mongo_documents)
 
+    @profiled
     def replace_one(
         self,
         data: Document,
@@ -147,57 +398,49 @@ class Collection:
         search_param: dict | None = None,
         partition_name: str | None = None,
         upsert: bool = False,
+        profiler: Profiler | None = None,
     ) -> UpdateResult:
+        filter = self.__resolve_filter(filter)
+        self.__resolve_document(data)
         if filter.milvus_filter is None:
-            return self.__mongo_collection.replace_one(
-                filter=filter.mongo_filter,
-                replacement=data.mongo_document,
-                upsert=upsert,
-            )
+            command = {"replace": self.__mongo_collection.name, "upsert": upsert}
+            with stage(profiler, "mongo_replace", "mongo", command) as step:
+                step.round_trips = 1
+                return self.__mongo_collection.replace_one(
+                    filter=filter.mongo_filter,
+                    replacement=data.mongo_document,
+                    upsert=upsert,
+                )
 
         document = self.find_one(
             filter=filter,
             fields=[Field(mongo_field="_id", milvus_field="id")],
             search_param=search_param,
-            partition_names=[partition_name],
+            partition_names=[partition_name] if partition_name else None,
+            profiler=profiler,
         )
 
         if not document:
             return EMPTY_UPDATE
 
-        mongo_result = self.__mongo_collection.replace_one(
-            filter={"_id": document["_id"]},
-            replacement=data.mongo_document,
-            upsert=upsert,
-        )
-
-        if mongo_result.upserted_id:
-            milvus_result = self.__milvus_collection.insert(
-                [data.milvus_array],
-                partition_name=partition_name,
+        if self.__identity_keys:
+            data.mongo_document["milvus_id"] = pk_from_id(
+                document["_id"], self.__pk_type
             )
-        elif mongo_result.matched_count:
-            milvus_result = self.__update_milvus(
-                arrays=[data.milvus_array],
-                documents=[document],
-                partition_name=partition_name,
-                recover=True,
+        command = {"replace": self.__mongo_collection.name, "upsert": upsert}
+        with stage(profiler, "mongo_replace", "mongo", command) as step:
+            step.round_trips = 1
+            mongo_result = self.__mongo_collection.replace_one(
+                filter={"_id": document["_id"]},
+                replacement=data.mongo_document,
+                upsert=upsert,
             )
-        else:
-            return EMPTY_UPDATE
-
-        if milvus_result is None or not milvus_result.insert_count:
-            # Add the old document back in case something went wrong with milvus
-            document.pop("milvus_data")
-            self.__mongo_collection.replace_one({"_id": document["_id"]}, document)
-            return EMPTY_UPDATE
 
-        return self.__mongo_collection.update_one(
-            filter={"_id": document["_id"]},
-            update={"milvus_id": milvus_result[0][0].id},
-            upsert=upsert,
+        return self.__sync_milvus(
+            data, document, mongo_result, partition_name, upsert, profiler
         )
 
+    @profiled
     def update_one(
         self,
         data: Document,
@@ -205,54 +448,42 @@ class Collection:
         search_param: dict | None = None,
         partition_name: str | None = None,
         upsert: bool = False,
+        profiler: Profiler | None = None,
     ) -> UpdateResult:
+        filter = self.__resolve_filter(filter)
+        self.__resolve_document(data)
         if filter.milvus_filter is None:
-            return self.__mongo_collection.update_one(
-                filter.mongo_filter,
-                data.mongo_document,
-            )
+            command = {"update": self.__mongo_collection.name, "multi": False}
+            with stage(profiler, "mongo_update", "mongo", command) as step:
+                step.round_trips = 1
+                return self.__mongo_collection.update_one(
+                    filter.mongo_filter,
+                    data.mongo_document,
+                )
 
         document = self.find_one(
             filter=filter,
             fields=[Field(mongo_field="_id", milvus_field="id")],
             search_param=search_param,
-            partition_names=[partition_name],
+            partition_names=[partition_name] if partition_name else None,
+            profiler=profiler,
         )
 
         if not document:
             return EMPTY_UPDATE
 
-        mongo_result = self.__mongo_collection.update_one(
-            {"_id": document["_id"]}, data.mongo_document
-        )
-
-        if mongo_result.upserted_id:
-            milvus_result = self.__milvus_collection.insert(
-                [data.milvus_array],
-                partition_name=partition_name,
-            )
-        elif mongo_result.matched_count:
-            milvus_result = self.__update_milvus(
-                arrays=[data.milvus_array],
-                documents=[document],
-                partition_name=partition_name,
-                recover=True,
+        command = {"update": self.__mongo_collection.name, "multi": False}
+        with stage(profiler, "mongo_update", "mongo", command) as step:
+            step.round_trips = 1
+            mongo_result = self.__mongo_collection.update_one(
+                {"_id": document["_id"]}, data.mongo_document
             )
-        else:
-            return EMPTY_UPDATE
-
-        if milvus_result is None or not milvus_result.insert_count:
-            # Add the old document back in case something went wrong with milvus
-            document.pop("milvus_data")
-            self.__mongo_collection.update_one({"_id": document["_id"]}, document)
-            return EMPTY_UPDATE
 
-        return self.__mongo_collection.update_one(
-            filter={"_id": document["_id"]},
-            update={"milvus_id": milvus_result[0][0].id},
-            upsert=upsert,
+        return self.__sync_milvus(
+            data, document, mongo_result, partition_name, upsert, profiler
         )
 
+    @profiled
     def update_many(
         self,
         data: Document,
@@ -260,90 +491,132 @@ class Collection:
         search_param: dict | None = None,
         partition_name: str | None = None,
         upsert: bool = True,
+        profiler: Profiler | None = None,
     ) -> UpdateResult:
+        filter = self.__resolve_filter(filter)
+        command = {"update": self.__mongo_collection.name, "multi": True}
         if filter.milvus_filter is None:
-            return self.__mongo_collection.update_many(
-                filter.mongo_filter,
-                data.mongo_document,
-                upsert=upsert,
-            )
+            with stage(profiler, "mongo_update", "mongo", command) as step:
+                step.round_trips = 1
+                return self.__mongo_collection.update_many(
+                    filter.mongo_filter,
+                    data.mongo_document,
+                    upsert=upsert,
+                )
 
         documents = self.find_many(
             filter=filter,
             fields=[Field(mongo_field="_id", milvus_field="id")],
             search_param=search_param,
-            partition_names=[partition_name],
+            partition_names=[partition_name] if partition_name else None,
+            profiler=profiler,
         )
         if not documents:
             return EMPTY_UPDATE
 
         mongo_filter = {"_id": {"$in": [doc["_id"] for doc in documents]}}
-        return self.__mongo_collection.update_many(
-            filter=mongo_filter,
-            update=data.mongo_document,
-            upsert=upsert,
-        )
+        with stage(profiler, "mongo_update", "mongo", command) as step:
+            step.round_trips = 1
+            step.candidates_in = len(documents)
+            mongo_result = self.__mongo_collection.update_many(
+                filter=mongo_filter,
+                update=data.mongo_document,
+                upsert=upsert,
+            )
+            step.candidates_out = mongo_result.modified_count
+
+        return mongo_result
 
+    @profiled
     def delete_one(
         self,
         filter: Filter | None = None,
         partition_name: str | None = None,
+        profiler: Profiler | None = None,
     ) -> DeleteResult:
+        filter = self.__resolve_filter(filter)
+        command = {"delete": self.__mongo_collection.name, "limit": 1}
         if filter.milvus_filter is None:
-            return self.__mongo_collection.delete_one(filter.mongo_filter)
+            with stage(profiler, "mongo_delete", "mongo", command) as step:
+                step.round_trips = 1
+                return self.__mongo_collection.delete_one(filter.mongo_filter)
 
         document = self.find_one(
             filter=filter,
-            partition_name=partition_name,
+            partition_names=[partition_name] if partition_name else None,
             fields=[Field(mongo_field="_id", milvus_field="id")],
+            profiler=profiler,
         )
 
         if not document:
             return EMPTY_DELETE
 
-        mongo_result = self.__mongo_collection.delete_one({"_id": document["_id"]})
+        with stage(profiler, "mongo_delete", "mongo", command) as step:
+            step.round_trips = 1
+            mongo_result = self.__mongo_collection.delete_one({"_id": document["_id"]})
         if not mongo_result.deleted_count:
             return EMPTY_DELETE
 
-        milvus_result = self.__milvus_collection.delete(
-            f"id in [{document['milvus_id']}]"
-        )
+        pk_name = self.__milvus_collection.schema.primary_field.name
+        expr = milvus_in_expr(pk_name, [document["milvus_id"]])
+        command = {"delete": self.__milvus_collection.name, "expr": expr}
+        with stage(profiler, "milvus_delete", "milvus", command) as step:
+            step.round_trips = 1
+            milvus_result = self.__milvus_collection.delete(expr)
         if not milvus_result.delete_count:
-            document.pop("milvus_data")
-            self.__mongo_collection.insert_one(document)
+            command = {"insert": self.__mongo_collection.name}
+            with stage(profiler, "compensation", "mongo", command) as step:
+                step.round_trips = 1
+                document.pop("milvus_data")
+                self.__mongo_collection.insert_one(document)
             return EMPTY_DELETE
 
         return mongo_result
 
+    @profiled
     def delete_many(
         self,
         filter: Filter | None = None,
         partition_name: str | None = None,
+        profiler: Profiler | None = None,
     ) -> DeleteResult:
+        filter = self.__resolve_filter(filter)
+        command = {"delete": self.__mongo_collection.name, "limit": 0}
         if filter.milvus_filter is None:
-            return self.__mongo_collection.delete_many(filter.mongo_filter)
+            with stage(profiler, "mongo_delete", "mongo", command) as step:
+                step.round_trips = 1
+                return self.__mongo_collection.delete_many(filter.mongo_filter)
 
         documents = self.find_many(
             filter=filter,
-            partition_name=partition_name,
+            partition_names=[partition_name] if partition_name else None,
             fields=[Field(mongo_field="_id", milvus_field="id")],
+            profiler=profiler,
         )
 
         if not documents:
             return EMPTY_DELETE
 
-        mongo_result = self.__mongo_collection.delete_many(
-            {"_id": {"$in": [doc["_id"] for doc in documents]}}
-        )
+        with stage(profiler, "mongo_delete", "mongo", command) as step:
+            step.round_trips = 1
+            step.candidates_in = len(documents)
+            mongo_result = self.__mongo_collection.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in documents]}}
+            )
+            step.candidates_out = mongo_result.deleted_count
         if not mongo_result.deleted_count:
             return mongo_result
 
-        milvus_filter = [doc["milvus_id"] for doc in documents]
-        milvus_result = self.__milvus_collection.delete(
-            expr=f"id in [{', '.join(list(map(str, milvus_filter)))}]"
-        )
-        if not milvus_result.delete_count:
-            return mongo_result
+        pk_name = self.__milvus_collection.schema.primary_field.name
+        expr = milvus_in_expr(pk_name, [doc["milvus_id"] for doc in documents])
+        command = {"delete": self.__milvus_collection.name, "expr": expr}
+        with stage(profiler, "milvus_delete", "milvus", command) as step:
+            step.round_trips = 1
+            step.candidates_in = len(documents)
+            milvus_result = self.__milvus_collection.delete(expr=expr)
+            step.candidates_out = milvus_result.delete_count
+
+        return mongo_result
 
     def distinct(self, key, filter: dict | None = None) -> list[Any]:
         return self.__mongo_collection.distinct(key=key, filter=filter)
@@ -356,7 +629,11 @@ class Collection:
         return self.__mongo_collection.count_documents(filter)
 
     def create_indexes(self, indexes: list[Index]):
-        mongo_indexes = [asdict(index.mongo_index) for index in indexes]
+        mongo_indexes = [
+            asdict(index.mongo_index)
+            for index in indexes
+            if index.mongo_index is not None
+        ]
         milvus_indexes = [
             asdict(milvus_index)
             for index in indexes
@@ -376,11 +653,10 @@ class Collection:
             if "name" in milvus_index:
                 milvus_index["index_name"] = milvus_index.pop("name")
 
-            index_type: dict = milvus_index["index_type"]
+            index_type: dict = milvus_index.pop("index_type")
             milvus_index["index_params"] = {
-                "metric_type": milvus_index["metric_type"],
+                "metric_type": milvus_index.pop("metric_type"),
                 "index_type": index_type.pop("name"),
-                "index_params": {},
             }
             if index_type:
                 milvus_index["index_params"]["params"] = index_type
@@ -397,6 +673,34 @@ class Collection:
                 else:
                     self.__milvus_collection.drop_index(index_name=index.milvus_index)
 
+    def export_to(
+        self,
+        path: str | Path,
+        filter: dict | None = None,
+        batch_size: int = 1000,
+    ) -> dict:
+        return export_collection(
+            self.__mongo_collection,
+            self.__milvus_collection,
+            path,
+            mongo_filter=filter,
+            batch_size=batch_size,
+        )
+
+    def import_from(
+        self,
+        path: str | Path,
+        partition_name: str | None = None,
+        batch_size: int = 1000,
+    ) -> int:
+        return import_collection(
+            self.__mongo_collection,
+            self.__milvus_collection,
+            path,
+            partition_name=partition_name,
+            batch_size=batch_size,
+        )
+
     # =========== Mongo specific ===========
 
     @copy_sig(MongoCollection.with_options)
@@ -441,6 +745,685 @@ class Collection:
     def drop_partition(self, *args, **kwargs):
         return self.__milvus_collection.drop_partition(*args, **kwargs)
 
+    def __find_many(
+        self,
+        filter: Filter | None,
+        sort: list[tuple[str, str | int]] | None,
+        fields: list[Field] | None,
+        search_param: dict | None,
+        partition_names: list[str] | None,
+        limit: int,
+        rerank_factor: int | None,
+        fusion: Fusion | None,
+        raw: bool,
+        timeout: float | None,
+        profiler: Profiler | None,
+    ) -> list[dict]:
+        deadline = None if timeout is None else Deadline(timeout)
+        filter = self.__resolve_filter(filter)
+        mongo_filter, milvus_filter = None, None
+        if filter is not None:
+            mongo_filter = filter.mongo_filter
+            milvus_filter = filter.milvus_filter
+
+        milvus_fields = [field.milvus_field for field in fields] if fields else None
+        milvus_ids = {}
+        ranked_order = False
+        if milvus_filter is not None:
+            # Query milvus by vector similarity, one leg per anns field
+            leg_args = (
+                search_param,
+                partition_names,
+                milvus_fields,
+                limit,
+                rerank_factor,
+                deadline,
+                profiler,
+            )
+            if len(milvus_filter) == 1:
+                field_name, field_value = next(iter(milvus_filter.items()))
+                ranked = self.__search_field(field_name, field_value, *leg_args)
+                ranked_order = bool(rerank_factor and limit)
+            else:
+                legs = {
+                    field_name: _executor("search").submit(
+                        self.__search_field, field_name, field_value, *leg_args
+                    )
+                    for field_name, field_value in milvus_filter.items()
+                }
+                legs = {field_name: leg.result() for field_name, leg in legs.items()}
+
+                fusion = fusion or Fusion()
+                metric_types = {}
+                if fusion.method == "weighted":
+                    metric_types = {
+                        field_name: self.__metric_type(
+                            field_name, _field_param(search_param, field_name)
+                        )
+                        for field_name in legs
+                    }
+                ranked = fuse(fusion, legs, metric_types, limit)
+                ranked_order = True
+
+            for hits in ranked:
+                for hit in hits:
+                    milvus_ids.setdefault(hit.id, hit)
+
+            if not milvus_ids:
+                return []
+
+        mongo_filter = dict(mongo_filter or {})
+        if milvus_ids:
+            mongo_filter = self.__join_filter(mongo_filter, milvus_ids)
+
+        mongo_fields = None
+        if fields:
+            mongo_fields = {field.mongo_field: True for field in fields}
+            mongo_fields["milvus_id"] = True
+
+        command = {
+            "find": self.__mongo_collection.name,
+            "filter": mongo_filter,
+            "sort": sort,
+            "projection": mongo_fields,
+            "limit": limit,
+        }
+        mongo_collection = self.__mongo_collection
+        if raw:
+            # Documents stay undecoded bytes until a field is actually read
+            mongo_collection = mongo_collection.with_options(
+                codec_options=RAW_CODEC_OPTIONS
+            )
+        with stage(profiler, "mongo_join", "mongo", command) as step, deadline_stage(
+            deadline, "join"
+        ) as budget, pymongo.timeout(budget):
+            mongo_results = list(
+                mongo_collection.find(
+                    mongo_filter, projection=mongo_fields, sort=sort, limit=limit
+                )
+            )
+
+            step.candidates_in = len(milvus_ids)
+            step.candidates_out = len(mongo_results)
+            if profiler is not None:
+                step.bytes_sent = bson_size([mongo_filter])
+                step.bytes_received = bson_size(mongo_results)
+                step.round_trips = mongo_round_trips(
+                    len(mongo_results), step.bytes_received
+                )
+                if profiler.explain:
+                    step.explain = self.__mongo_collection.find(
+                        mongo_filter, projection=mongo_fields, sort=sort, limit=limit
+                    ).explain()
+
+        final_results = []
+        pending_results = {}
+        for result in mongo_results:
+            milvus_id = milvus_id_of(result)
+            if milvus_id in milvus_ids:
+                attach(result, milvus_ids[milvus_id])
+                final_results.append(result)
+            elif milvus_id is not None:
+                pending_results[milvus_id] = result
+
+        if pending_results:
+            # Query milvus by mongo's primary keys if needed
+            pk_name = self.__milvus_collection.schema.primary_field.name
+            expr = milvus_in_expr(pk_name, pending_results.keys())
+            command = {"query": self.__milvus_collection.name, "expr": expr}
+            with stage(
+                profiler, "milvus_pending_query", "milvus", command
+            ) as step, deadline_stage(deadline, "hydrate") as budget:
+                milvus_results = self.__milvus_collection.query(
+                    expr, output_fields=milvus_fields, timeout=budget
+                )
+                for record in milvus_results:
+                    mongo_result = pending_results[record[pk_name]]
+                    attach(mongo_result, record)
+                    final_results.append(mongo_result)
+
+                step.round_trips = 1
+                step.candidates_in = len(pending_results)
+                step.candidates_out = len(milvus_results)
+                if profiler is not None:
+                    step.bytes_sent = len(expr)
+                    step.bytes_received = bson_size(milvus_results)
+
+        if ranked_order and not sort:
+            rank = {
+                milvus_id: position for position, milvus_id in enumerate(milvus_ids)
+            }
+            final_results.sort(key=lambda result: rank[milvus_id_of(result)])
+
+        return final_results
+
+    def __extend_hits(
+        self,
+        state: CursorState,
+        wanted: int,
+        deadline: Deadline | None,
+        profiler: Profiler | None,
+    ) -> None:
+        with state.lock:
+            while len(state.hits) < wanted and not state.exhausted:
+                offset = len(state.hits)
+                limit = min(
+                    max(2 * state.page_size, wanted - offset), MAX_TOPK - offset
+                )
+                if limit <= 0:
+                    state.exhausted = True
+                    return
+
+                milvus_fields = (
+                    [field.milvus_field for field in state.fields]
+                    if state.fields
+                    else None
+                )
+                ranked = self.__search_field(
+                    state.field_name,
+                    state.query,
+                    with_offset(state.search_param, offset),
+                    state.partition_names,
+                    milvus_fields,
+                    limit,
+                    None,
+                    deadline,
+                    profiler,
+                )
+                hits = ranked[0] if ranked else []
+                if len(hits) < limit:
+                    state.exhausted = True
+
+                # Offsets shift when the collection changes between pages
+                for hit in hits:
+                    if hit.id not in state.seen:
+                        state.seen.add(hit.id)
+                        state.hits.append(hit)
+
+    def __hydrate_page(
+        self,
+        state: CursorState,
+        hits: list,
+        deadline: Deadline | None,
+        profiler: Profiler | None,
+    ) -> list[dict]:
+        hits = {hit.id: hit for hit in hits}
+        mongo_filter = self.__join_filter(state.mongo_filter, hits)
+        mongo_fields = None
+        if state.fields:
+            mongo_fields = {field.mongo_field: True for field in state.fields}
+            mongo_fields["milvus_id"] = True
+
+        command = {
+            "find": self.__mongo_collection.name,
+            "filter": mongo_filter,
+            "projection": mongo_fields,
+        }
+        with stage(profiler, "mongo_join", "mongo", command) as step, deadline_stage(
+            deadline, "join"
+        ) as budget, pymongo.timeout(budget):
+            documents = list(
+                self.__mongo_collection.find(mongo_filter, projection=mongo_fields)
+            )
+
+            step.candidates_in = len(hits)
+            step.candidates_out = len(documents)
+            if profiler is not None:
+                step.bytes_sent = bson_size([mongo_filter])
+                step.bytes_received = bson_size(documents)
+                step.round_trips = mongo_round_trips(
+                    len(documents), step.bytes_received
+                )
+
+        for document in documents:
+            document["milvus_data"] = hits[document["milvus_id"]]
+
+        return rank_order(documents, list(hits))
+
+    def __search_field(
+        self,
+        field_name: str,
+        field_value: list,
+        search_param: dict | None,
+        partition_names: list[str] | None,
+        milvus_fields: list[str] | None,
+        limit: int,
+        rerank_factor: int | None,
+        deadline: Deadline | None,
+        profiler: Profiler | None,
+    ) -> list[list]:
+        search_param = _field_param(search_param, field_name)
+        reranked = bool(rerank_factor and limit)
+        # Over-fetch from the compressed index and rank exactly afterwards
+        search_limit = limit * rerank_factor if reranked else limit
+        if self.__autotuner is not None:
+            search_param = self.__autotuner.tune(
+                self.__milvus_collection, field_name, search_param, search_limit
+            )
+        command = {
+            "search": self.__milvus_collection.name,
+            "anns_field": field_name,
+            "nq": len(field_value),
+            "param": search_param,
+            "limit": search_limit,
+            "partition_names": partition_names,
+        }
+        with stage(
+            profiler, "milvus_search", "milvus", command
+        ) as step, deadline_stage(deadline, "search") as budget:
+            started = time.perf_counter()
+            milvus_results = self.__search(
+                timeout=budget,
+                data=field_value,
+                output_fields=milvus_fields,
+                anns_field=field_name,
+                param=search_param,
+                partition_names=partition_names,
+                limit=search_limit,
+            )
+            ranked = [list(result) for result in milvus_results]
+            if self.__autotuner is not None:
+                self.__autotuner.observe(
+                    self.__milvus_collection,
+                    field_name,
+                    search_param,
+                    field_value[0],
+                    [hit.id for hit in ranked[0]] if ranked else [],
+                    time.perf_counter() - started,
+                )
+
+            step.round_trips = 1
+            step.candidates_in = len(field_value)
+            step.candidates_out = sum(len(hits) for hits in ranked)
+            if profiler is not None:
+                step.bytes_sent = vector_size(field_value)
+                step.bytes_received = HIT_BYTES * step.candidates_out
+
+        if reranked and any(ranked):
+            ranked = self.__rerank(
+                field_name,
+                field_value,
+                ranked,
+                search_param,
+                limit,
+                deadline,
+                profiler,
+            )
+
+        return ranked
+
+    def __rerank(
+        self,
+        field_name: str,
+        queries: list,
+        milvus_results,
+        search_param: dict | None,
+        limit: int,
+        deadline: Deadline | None,
+        profiler: Profiler | None,
+    ) -> list[list[ExactHit]]:
+        hits = {hit.id: hit for result in milvus_results for hit in result}
+        candidates = [[hit.id for hit in result] for result in milvus_results]
+        schema = self.__milvus_collection.schema
+        pk_name = schema.primary_field.name
+        binary = any(
+            field.name == field_name and field.dtype == DataType.BINARY_VECTOR
+            for field in schema.fields
+        )
+
+        expr = milvus_in_expr(pk_name, hits.keys())
+        command = {
+            "query": self.__milvus_collection.name,
+            "pks": len(hits),
+            "output_fields": [field_name],
+        }
+        with stage(
+            profiler, "milvus_rerank", "milvus", command
+        ) as step, deadline_stage(deadline, "rerank") as budget:
+            records = self.__milvus_collection.query(
+                expr, output_fields=[field_name], timeout=budget
+            )
+            matrix = as_matrix([record[field_name] for record in records], binary)
+            vectors = dict(zip((record[pk_name] for record in records), matrix))
+            ranked = rerank(
+                self.__metric_type(field_name, search_param),
+                as_matrix(queries, binary),
+                candidates,
+                vectors,
+                limit,
+            )
+
+            ranked = [
+                [
+                    ExactHit(
+                        milvus_id,
+                        distance,
+                        hits[milvus_id].distance,
+                        hits[milvus_id],
+                    )
+                    for milvus_id, distance in results
+                ]
+                for results in ranked
+            ]
+
+            step.round_trips = 1
+            step.candidates_in = len(hits)
+            step.candidates_out = sum(len(results) for results in ranked)
+            if profiler is not None:
+                step.bytes_sent = len(expr)
+                step.bytes_received = matrix.nbytes
+
+        return ranked
+
+    def __metric_type(self, field_name: str, search_param: dict | None) -> str:
+        if search_param and search_param.get("metric_type"):
+            return search_param["metric_type"]
+
+        for index in self.__milvus_collection.indexes:
+            if index.field_name == field_name:
+                return index.params["metric_type"]
+
+        raise ValueError(f"No metric type known for field: {field_name}")
+
+    def __search(self, timeout: float | None = None, **kwargs):
+        if self.__hedging is not None:
+            return self.__hedging.search(
+                self.__milvus_collection, timeout=timeout, **kwargs
+            )
+
+        return self.__milvus_collection.search(timeout=timeout, **kwargs)
+
+    def __embed(self, contents: list) -> list[list[float]]:
+        if self.__embedder is None:
+            raise ValueError("Collection has no embedder to vectorize raw content")
+
+        return self.__embedder.embed(contents)
+
+    def __resolve_filter(self, filter: Filter | None) -> Filter | None:
+        if filter is None or not filter.milvus_content:
+            return filter
+
+        milvus_filter = dict(filter.milvus_filter or {})
+        for field_name, contents in filter.milvus_content.items():
+            milvus_filter[field_name] = self.__embed(contents)
+
+        return Filter(mongo_filter=filter.mongo_filter, milvus_filter=milvus_filter)
+
+    def __resolve_document(self, data: Document) -> None:
+        if data.milvus_array is None and data.content is not None:
+            data.milvus_array = self.__embed([data.content])
+
+    def __insert_identity(
+        self,
+        group: list[Document],
+        partition_name: str | None,
+        write: Callable[[], InsertOneResult | InsertManyResult],
+    ) -> InsertOneResult | InsertManyResult:
+        vectorized = [data for data in group if data.milvus_array is not None]
+        if vectorized and _supplies_id(group):
+            return self.__insert_mongo_first(group, vectorized, partition_name, write)
+
+        milvus_future = None
+        if vectorized:
+            # The pk is known up front, so neither store waits for the other
+            milvus_future = _executor("write").submit(
+                self.__milvus_collection.insert,
+                self.__milvus_columns(vectorized),
+                partition_name,
+            )
+
+        try:
+            mongo_result = write()
+        except Exception:
+            if milvus_future is not None:
+                self.__discard_vectors(milvus_future, vectorized)
+            raise
+
+        if milvus_future is not None:
+            try:
+                milvus_future.result()
+            except Exception:
+                self.__mongo_collection.delete_many(
+                    {"_id": {"$in": [data.mongo_document["_id"] for data in group]}}
+                )
+                raise
+
+        return mongo_result
+
+    def __insert_mongo_first(
+        self,
+        group: list[Document],
+        vectorized: list[Document],
+        partition_name: str | None,
+        write: Callable[[], InsertOneResult | InsertManyResult],
+    ) -> InsertOneResult | InsertManyResult:
+        # A supplied _id may belong to a document that already exists, and a
+        # vector written up front would replace that document's own. Only the
+        # documents mongo took get their vectors.
+        self.__milvus_columns(vectorized)
+        error = None
+        try:
+            mongo_result = write()
+            landed = group
+        except BulkWriteError as e:
+            error = e
+            failed = {write_error["index"] for write_error in e.details["writeErrors"]}
+            landed = [
+                data for position, data in enumerate(group) if position not in failed
+            ][: e.details["nInserted"]]
+
+        self.__insert_landed(landed, partition_name)
+        if error is not None:
+            raise error
+        return mongo_result
+
+    def __insert_landed(self, landed: list[Document], partition_name: str | None):
+        vectorized = [data for data in landed if data.milvus_array is not None]
+        if not vectorized:
+            return
+
+        try:
+            self.__milvus_collection.insert(
+                self.__milvus_columns(vectorized), partition_name
+            )
+        except Exception:
+            self.__mongo_collection.delete_many(
+                {"_id": {"$in": [data.mongo_document["_id"] for data in landed]}}
+            )
+            raise
+
+    def __discard_vectors(self, milvus_future: Future, group: list[Document]) -> None:
+        if milvus_future.exception() is not None:
+            return
+
+        # Documents written before the failure keep their vectors
+        ids = [data.mongo_document["_id"] for data in group]
+        written = {
+            document["_id"]
+            for document in self.__mongo_collection.find(
+                {"_id": {"$in": ids}}, projection={"_id": True}
+            )
+        }
+        orphans = [pk_from_id(_id) for _id in ids if _id not in written]
+        if orphans:
+            pk_name = self.__milvus_collection.schema.primary_field.name
+            self.__milvus_collection.delete(milvus_in_expr(pk_name, orphans))
+
+    def __milvus_columns(self, group: list[Document]) -> list[list]:
+        # One row per document, transposed into the columns milvus expects
+        columns = [
+            list(column) for column in zip(*(data.milvus_array for data in group))
+        ]
+        if not self.__identity_keys:
+            return columns
+
+        pks = []
+        for data in group:
+            _id = data.mongo_document.setdefault("_id", ObjectId())
+            data.mongo_document["milvus_id"] = pk_from_id(_id, self.__pk_type)
+            pks.append(data.mongo_document["milvus_id"])
+        return pk_columns(self.__milvus_collection.schema, columns, pks)
+
+    def __join_filter(self, mongo_filter: dict, milvus_ids: Iterable) -> dict:
+        if not self.__identity_keys:
+            return {**mongo_filter, "milvus_id": {"$in": list(milvus_ids)}}
+
+        # Every pk maps straight back to its _id, so the join hits the
+        # primary index instead of a milvus_id lookup
+        condition = {"_id": {"$in": [id_from_pk(pk) for pk in milvus_ids]}}
+        if "_id" in mongo_filter:
+            return {"$and": [mongo_filter, condition]}
+        return {**mongo_filter, **condition}
+
+    def __commit_inserts(
+        self, items: list[tuple[Document, str | None]]
+    ) -> list[InsertOneResult | Exception]:
+        results = [None] * len(items)
+        groups = {}
+        for position, (_, partition_name) in enumerate(items):
+            groups.setdefault(partition_name, []).append(position)
+
+        for partition_name, positions in groups.items():
+            try:
+                for position, result in zip(
+                    positions,
+                    self.__commit_group(
+                        [items[position][0] for position in positions], partition_name
+                    ),
+                ):
+                    results[position] = result
+            except Exception as e:
+                for position in positions:
+                    results[position] = e
+
+        return results
+
+    def __commit_group(
+        self, group: list[Document], partition_name: str | None
+    ) -> list[InsertOneResult | Exception]:
+        vectorized = [data for data in group if data.milvus_array is not None]
+        mongo_first = self.__identity_keys and _supplies_id(group)
+        if mongo_first:
+            self.__milvus_columns(vectorized)
+        elif vectorized:
+            result = self.__milvus_collection.insert(
+                self.__milvus_columns(vectorized), partition_name
+            )
+            for data, milvus_pk in zip(vectorized, result.primary_keys):
+                data.mongo_document["milvus_id"] = milvus_pk
+
+        documents = [data.mongo_document for data in group]
+        results = []
+        try:
+            mongo_result = self.__mongo_collection.insert_many(documents, ordered=False)
+            write_errors, write_concern_errors = {}, []
+            acknowledged = mongo_result.acknowledged
+        except BulkWriteError as e:
+            write_errors = {error["index"]: error for error in e.details["writeErrors"]}
+            write_concern_errors = e.details.get("writeConcernErrors", [])
+            acknowledged = True
+
+        failed = []
+        for position, document in enumerate(documents):
+            error = write_errors.get(position)
+            if error is not None:
+                error_type = DuplicateKeyError if error["code"] == 11000 else WriteError
+                results.append(error_type(error["errmsg"], error["code"], error))
+                failed.append(document.get("milvus_id"))
+            elif write_concern_errors:
+                error = write_concern_errors[-1]
+                results.append(WriteConcernError(error["errmsg"], error["code"], error))
+            else:
+                results.append(InsertOneResult(document["_id"], acknowledged))
+
+        if mongo_first:
+            # Documents with only a write concern error did land
+            landed = [
+                position
+                for position in range(len(documents))
+                if position not in write_errors
+            ]
+            try:
+                self.__insert_landed(
+                    [group[position] for position in landed], partition_name
+                )
+            except Exception as e:
+                for position in landed:
+                    results[position] = e
+            return results
+
+        # Vectors of rejected documents would otherwise be left behind as orphans
+        failed = [milvus_id for milvus_id in failed if milvus_id is not None]
+        if failed:
+            pk_name = self.__milvus_collection.schema.primary_field.name
+            self.__milvus_collection.delete(milvus_in_expr(pk_name, failed))
+
+        return results
+
+    def __sync_milvus(
+        self,
+        data: Document,
+        document: dict,
+        mongo_result: UpdateResult,
+        partition_name: str | None,
+        upsert: bool,
+        profiler: Profiler | None,
+    ) -> UpdateResult:
+        if mongo_result.upserted_id:
+            arrays = [data.milvus_array]
+            if self.__identity_keys:
+                arrays = self.__milvus_columns(
+                    [Document({"_id": mongo_result.upserted_id}, data.milvus_array)]
+                )
+            command = {"insert": self.__milvus_collection.name, "rows": 1}
+            with stage(profiler, "milvus_insert", "milvus", command) as step:
+                step.round_trips = 1
+                milvus_result = self.__milvus_collection.insert(
+                    arrays,
+                    partition_name=partition_name,
+                )
+        elif mongo_result.matched_count:
+            arrays = [data.milvus_array]
+            if self.__identity_keys:
+                # Same pk as before, so the mongo side needs no repointing
+                arrays = self.__milvus_columns(
+                    [Document({"_id": document["_id"]}, data.milvus_array)]
+                )
+            milvus_result = self.__update_milvus(
+                arrays=arrays,
+                documents=[document],
+                partition_name=partition_name,
+                recover=True,
+                profiler=profiler,
+            )
+        else:
+            return EMPTY_UPDATE
+
+        if milvus_result is None:
+            # The old document was already put back while updating milvus
+            return EMPTY_UPDATE
+
+        if not milvus_result.insert_count:
+            # Add the old document back in case something went wrong with milvus
+            command = {"replace": self.__mongo_collection.name}
+            with stage(profiler, "compensation", "mongo", command) as step:
+                step.round_trips = 1
+                document.pop("milvus_data")
+                self.__mongo_collection.replace_one({"_id": document["_id"]}, document)
+            return EMPTY_UPDATE
+
+        if self.__identity_keys and not mongo_result.upserted_id:
+            return mongo_result
+
+        command = {"update": self.__mongo_collection.name, "multi": False}
+        with stage(profiler, "mongo_repoint", "mongo", command) as step:
+            step.round_trips = 1
+            return self.__mongo_collection.update_one(
+                filter={"_id": document["_id"]},
+                update={"$set": {"milvus_id": milvus_result.primary_keys[0]}},
+                upsert=upsert,
+            )
+
     def __update_milvus(
         self,
         arrays: list,
@@ -448,35 +1431,54 @@ class Collection:
         partition_name: str | None = None,
         recover: bool = False,
         upsert: bool = False,
+        profiler: Profiler | None = None,
     ):
-        milvus_filter = [doc["milvus_id"] for doc in documents]
+        pk_name = self.__milvus_collection.schema.primary_field.name
+        expr = milvus_in_expr(pk_name, [doc["milvus_id"] for doc in documents])
 
-        milvus_result = self.__milvus_collection.delete(
-            expr=f"id in [{', '.join(list(map(str, milvus_filter)))}]"
-        )
+        command = {"delete": self.__milvus_collection.name, "expr": expr}
+        with stage(profiler, "milvus_delete", "milvus", command) as step:
+            step.round_trips = 1
+            milvus_result = self.__milvus_collection.delete(expr=expr)
         if recover and (not upsert and not milvus_result.delete_count):
             # Add the old document back in case something went wrong with milvus
-            documents[0].pop("milvus_data")
-            self.__mongo_collection.replace_one(
-                {"_id": documents[0]["_id"]}, documents[0]
-            )
+            command = {"replace": self.__mongo_collection.name}
+            with stage(profiler, "compensation", "mongo", command) as step:
+                step.round_trips = 1
+                documents[0].pop("milvus_data")
+                self.__mongo_collection.replace_one(
+                    {"_id": documents[0]["_id"]}, documents[0]
+                )
             return
 
-        milvus_result = self.__milvus_collection.insert(arrays, partition_name)
+        command = {"insert": self.__milvus_collection.name, "rows": len(arrays)}
+        with stage(profiler, "milvus_insert", "milvus", command) as step:
+            step.round_trips = 1
+            milvus_result = self.__milvus_collection.insert(arrays, partition_name)
         if recover and not milvus_result.insert_count:
             # Add the old document back in case something went wrong with milvus
-            documents[0].pop("milvus_data")
-            self.__mongo_collection.update_one(
-                {"_id": documents[0]["_id"]}, documents[0]
-            )
-            self.__milvus_collection.insert(
-                [doc["milvus_data"] for doc in documents],
-                partition_name=partition_name,
-            )
+            command = {"replace": self.__mongo_collection.name}
+            with stage(profiler, "compensation", "mongo", command) as step:
+                step.round_trips = 2
+                milvus_data = [doc.pop("milvus_data") for doc in documents]
+                self.__mongo_collection.replace_one(
+                    {"_id": documents[0]["_id"]}, documents[0]
+                )
+                self.__milvus_collection.insert(
+                    milvus_data,
+                    partition_name=partition_name,
+                )
             return
 
         return milvus_result
 
 
+def _field_param(search_param: dict | None, field_name: str) -> dict | None:
+    # Multi-field searches may pass one search param per anns field
+    if search_param and isinstance(search_param.get(field_name), dict):
+        return search_param[field_name]
+    return search_param
+
+
 def _filter_none(obj: dict) -> dict:
-    return {key: val for key, val in obj.items() if key is not None}
+    return {key: val for key, val in obj.items() if val is not None}
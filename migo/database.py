@@ -1,9 +1,18 @@
+import threading
+
 from pymongo.database import Database as MongoDatabase
 from pymilvus.client.grpc_handler import GrpcHandler
 from pymilvus import Collection as MilvusCollection
+from pymilvus import connections
 
+from .autotune import SearchAutotuner
+from .batching import GroupCommit
 from .collection import Collection
 from .config import MilvusCollectionConfig
+from .embedding import EMBEDDING_FUNCTION, Embedder
+from .hedging import HedgedSearch
+from .pagination import CursorCache
+from .singleflight import SingleFlight
 
 MILVUS_DATABASE = tuple[str, GrpcHandler]
 
@@ -15,29 +24,38 @@ class Database:
         milvus_database: MILVUS_DATABASE,
     ) -> None:
         self.__mongo_database = mongo_database
-        self.__milvus_database = milvus_database
+        # Only the alias is kept, a forked process reconnects under it and
+        # the handler it resolves to changes
+        self.__milvus_alias = milvus_database[0]
+        self.__lock = threading.Lock()
+        self.__embedders: dict[EMBEDDING_FUNCTION, Embedder] = {}
+        self.__cursor_caches: dict[str, CursorCache] = {}
 
     def get_drivers(self) -> tuple[MongoDatabase, MILVUS_DATABASE]:
-        return (self.__mongo_database, self.__milvus_database)
+        return (self.__mongo_database, (self.__milvus_alias, self.__milvus_handler()))
 
     def get_collections(self) -> list[Collection]:
         collections = []
 
         mongo_collections = set(self.__mongo_database.list_collection_names())
-        for milvus_collection in self.__milvus_database[1].list_collections():
-            if milvus_collection not in mongo_collections:
-                continue
-
-            milvus_collection_impl = MilvusCollection(
-                milvus_collection, using=self.__milvus_database[0]
-            )
-            collections.append(
-                Collection(
-                    mongo_collection=self.__mongo_database[milvus_collection],
-                    milvus_collection=milvus_collection_impl,
+        milvus_handler = self.__milvus_handler()
+        for milvus_collection in milvus_handler.list_collections():
+            # Reindexed collections are reachable through an alias
+            aliases = milvus_handler.describe_collection(milvus_collection)["aliases"]
+            for name in [milvus_collection, *aliases]:
+                if name not in mongo_collections:
+                    continue
+
+                milvus_collection_impl = MilvusCollection(
+                    name, using=self.__milvus_alias
                 )
-            )
-            mongo_collections.remove(milvus_collection)
+                collections.append(
+                    Collection(
+                        mongo_collection=self.__mongo_database[name],
+                        milvus_collection=milvus_collection_impl,
+                    )
+                )
+                mongo_collections.remove(name)
 
         for mongo_collection in mongo_collections:
             collections.append(
@@ -49,15 +67,37 @@ class Database:
 
         return collections
 
-    def get_collection(self, name: str) -> Collection:
+    def get_collection(
+        self,
+        name: str,
+        embedder: Embedder | EMBEDDING_FUNCTION | None = None,
+        hedging: HedgedSearch | None = None,
+        coalescing: SingleFlight | None = None,
+        autotuner: SearchAutotuner | None = None,
+        cursor_cache: CursorCache | None = None,
+        group_commit: GroupCommit | None = None,
+        identity_keys: bool = False,
+    ) -> Collection:
         mongo_collection = self.__mongo_database[name]
         milvus_collection = None
-        if name in self.__milvus_database[1].list_collections():
-            milvus_collection = MilvusCollection(name, using=self.__milvus_database[0])
+        if self.__milvus_handler().has_collection(name):
+            milvus_collection = MilvusCollection(name, using=self.__milvus_alias)
+
+        if embedder is not None and not isinstance(embedder, Embedder):
+            embedder = self.__shared_embedder(embedder)
+        if cursor_cache is None:
+            cursor_cache = self.__shared_cursor_cache(name)
 
         return Collection(
             mongo_collection=mongo_collection,
             milvus_collection=milvus_collection,
+            embedder=embedder,
+            hedging=hedging,
+            coalescing=coalescing,
+            autotuner=autotuner,
+            cursor_cache=cursor_cache,
+            group_commit=group_commit,
+            identity_keys=identity_keys,
         )
 
     def create_collection(
@@ -68,16 +108,42 @@ class Database:
         if milvus_config is not None:
             if isinstance(milvus_config, MilvusCollectionConfig):
                 milvus_config = milvus_config.to_dict()
-            milvus_config["using"] = self.__milvus_database[0]
+            milvus_config["using"] = self.__milvus_alias
 
-            self.__milvus_database[1].create_collection(name, **milvus_config)
+            self.__milvus_handler().create_collection(name, **milvus_config)
 
         self.__mongo_database.create_collection(name)
 
     def delete_collection(self, name: str) -> None:
-        self.__milvus_database[1].drop_collection(name)
+        self.__milvus_handler().drop_collection(name)
         self.__mongo_database.drop_collection(name)
 
+    def close(self) -> None:
+        with self.__lock:
+            embedders = list(self.__embedders.values())
+            self.__embedders.clear()
+
+        for embedder in embedders:
+            embedder.close()
+
     @property
     def name(self) -> str:
         return self.__mongo_database.name
+
+    def __milvus_handler(self) -> GrpcHandler:
+        return connections._fetch_handler(self.__milvus_alias)
+
+    def __shared_cursor_cache(self, name: str) -> CursorCache:
+        # A cursor handed out by one lookup must still resolve on the next
+        with self.__lock:
+            if name not in self.__cursor_caches:
+                self.__cursor_caches[name] = CursorCache()
+            return self.__cursor_caches[name]
+
+    def __shared_embedder(self, function: EMBEDDING_FUNCTION) -> Embedder:
+        # Collections built from the same function share one batcher and
+        # cache, so dedup and batching work across them
+        with self.__lock:
+            if function not in self.__embedders:
+                self.__embedders[function] = Embedder(function)
+            return self.__embedders[function]
@@ -0,0 +1,54 @@
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Iterator
+
+DEFAULT_SHARES = {"search": 0.4, "rerank": 0.1, "join": 0.3, "hydrate": 0.2}
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class Deadline:
+    def __init__(self, timeout: float, shares: dict[str, float] | None = None) -> None:
+        self.__timeout = timeout
+        self.__expires = time.monotonic() + timeout
+        self.__shares = dict(shares or DEFAULT_SHARES)
+        self.__stages = list(self.__shares)
+
+    def remaining(self) -> float:
+        return self.__expires - time.monotonic()
+
+    def budget(self, stage: str) -> float:
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(
+                f"Deadline of {self.__timeout}s exceeded before {stage}"
+            )
+
+        # Whatever earlier stages did not use rolls over to the later ones
+        later = self.__stages[self.__stages.index(stage) :]
+        total = sum(self.__shares[name] for name in later)
+        return remaining * self.__shares[stage] / total if total else remaining
+
+    @contextmanager
+    def stage(self, stage: str) -> Iterator[float]:
+        budget = self.budget(stage)
+        started = time.monotonic()
+        try:
+            yield budget
+        except DeadlineExceeded:
+            raise
+        except Exception as e:
+            # Backend timeouts surface as driver specific errors
+            if time.monotonic() - started >= budget:
+                raise DeadlineExceeded(
+                    f"Deadline of {self.__timeout}s exceeded during {stage}"
+                ) from e
+            raise
+
+
+def deadline_stage(deadline: Deadline | None, stage: str) -> ContextManager:
+    if deadline is None:
+        return nullcontext(None)
+    return deadline.stage(stage)
@@ -0,0 +1,89 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable
+
+from .batching import MicroBatcher
+from .forking import track
+
+EMBEDDING_FUNCTION = Callable[[list], list[list[float]]]
+
+
+class Embedder:
+    def __init__(
+        self,
+        function: EMBEDDING_FUNCTION,
+        max_batch_size: int = 64,
+        max_wait: float = 0.005,
+        cache_size: int = 10000,
+    ) -> None:
+        self.__batcher = MicroBatcher(function, max_batch_size, max_wait)
+        self.__cache_size = cache_size
+        self.__cache: OrderedDict[bytes, list[float]] = OrderedDict()
+        self.__in_flight: dict[bytes, Future] = {}
+        # Reentrant since a future may complete before its callback is attached
+        self.__lock = threading.RLock()
+        self.hits = 0
+        self.misses = 0
+        track(self)
+
+    def embed(self, contents: list) -> list[list[float]]:
+        keys = [_content_key(content) for content in contents]
+        vectors: dict[bytes, list[float]] = {}
+        futures: dict[bytes, Future] = {}
+
+        with self.__lock:
+            for key, content in zip(keys, contents):
+                if key in vectors or key in futures:
+                    self.hits += 1
+                elif key in self.__cache:
+                    self.__cache.move_to_end(key)
+                    vectors[key] = self.__cache[key]
+                    self.hits += 1
+                elif key in self.__in_flight:
+                    # Another caller is already embedding the same content
+                    futures[key] = self.__in_flight[key]
+                    self.hits += 1
+                else:
+                    future = self.__batcher.submit(content)
+                    future.add_done_callback(
+                        lambda future, key=key: self.__store(key, future)
+                    )
+                    self.__in_flight[key] = futures[key] = future
+                    self.misses += 1
+
+        for key, future in futures.items():
+            vectors[key] = future.result()
+
+        return [vectors[key] for key in keys]
+
+    def close(self) -> None:
+        self.__batcher.close()
+
+    def _after_fork(self) -> None:
+        # The batcher drops its queue in the child, so whatever was in flight
+        # is never going to be embedded here
+        self.__lock = threading.RLock()
+        self.__in_flight = {}
+
+    def __store(self, key: bytes, future: Future) -> None:
+        with self.__lock:
+            self.__in_flight.pop(key, None)
+            if future.exception() is not None or not self.__cache_size:
+                return
+
+            self.__cache[key] = future.result()
+            if len(self.__cache) > self.__cache_size:
+                self.__cache.popitem(last=False)
+
+
+def _content_key(content: Any) -> bytes:
+    if isinstance(content, str):
+        content = content.encode()
+    elif hasattr(content, "tobytes"):
+        content = content.tobytes()
+    elif not isinstance(content, bytes):
+        content = repr(content).encode()
+
+    return hashlib.sha256(content).digest()
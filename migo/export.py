@@ -0,0 +1,273 @@
+import json
+import struct
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import IO
+
+import numpy as np
+from bson import json_util
+from pymilvus import Collection as MilvusCollection
+from pymilvus import DataType, FieldSchema
+from pymongo import ASCENDING
+from pymongo.collection import Collection as MongoCollection
+
+from .utils import VECTOR_TYPES, batched, milvus_in_expr
+
+FORMAT_VERSION = 1
+MANIFEST_FILE = "manifest.json"
+DOCUMENTS_FILE = "documents.jsonl"
+# Fixed size npy header so it can be rewritten with the final row count
+NPY_HEADER_SIZE = 128
+
+
+def export_collection(
+    mongo_collection: MongoCollection,
+    milvus_collection: MilvusCollection | None,
+    path: str | Path,
+    mongo_filter: dict | None = None,
+    batch_size: int = 1000,
+    max_pending: int = 4,
+) -> dict:
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+
+    pk_field, vector_fields, scalar_fields = _split_schema(milvus_collection)
+    vector_files = {
+        field.name: open(path / f"{field.name}.npy", "wb") for field in vector_fields
+    }
+    documents_file = open(path / DOCUMENTS_FILE, "w")
+    # One single-threaded writer per file keeps each output ordered while
+    # letting the files be written in parallel with the next batch fetch
+    writers = {
+        name: ThreadPoolExecutor(max_workers=1)
+        for name in [*vector_files, DOCUMENTS_FILE]
+    }
+    pending: deque[Future] = deque()
+
+    try:
+        for vector_file in vector_files.values():
+            vector_file.write(b"\x00" * NPY_HEADER_SIZE)
+
+        cursor = mongo_collection.find(
+            mongo_filter or {},
+            sort=[("milvus_id", ASCENDING)],
+            batch_size=batch_size,
+            allow_disk_use=True,
+        )
+
+        document_count, vector_count = 0, 0
+        for documents in batched(cursor, batch_size):
+            milvus_records = _fetch_milvus_records(
+                milvus_collection, pk_field, documents
+            )
+
+            lines = []
+            columns = {field.name: [] for field in vector_fields}
+            for document in documents:
+                record = milvus_records.get(document.get("milvus_id"))
+                row = {"document": document, "milvus": None, "vector_row": None}
+                if record is not None:
+                    row["milvus"] = {
+                        field.name: record[field.name] for field in scalar_fields
+                    }
+                    row["vector_row"] = vector_count
+                    vector_count += 1
+                    for name, column in columns.items():
+                        column.append(record[name])
+
+                lines.append(json_util.dumps(row) + "\n")
+
+            for field in vector_fields:
+                if columns[field.name]:
+                    data = _vector_bytes(field, columns[field.name])
+                    pending.append(
+                        writers[field.name].submit(vector_files[field.name].write, data)
+                    )
+            pending.append(
+                writers[DOCUMENTS_FILE].submit(documents_file.write, "".join(lines))
+            )
+            document_count += len(documents)
+
+            while len(pending) > max_pending * len(writers):
+                pending.popleft().result()
+
+        while pending:
+            pending.popleft().result()
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "documents": document_count,
+            "vectors": vector_count,
+            "primary_field": pk_field.name if pk_field else None,
+            "vector_fields": {},
+        }
+        for field in vector_fields:
+            dtype, width = _vector_layout(field)
+            _write_npy_header(vector_files[field.name], dtype, (vector_count, width))
+            manifest["vector_fields"][field.name] = {
+                "file": f"{field.name}.npy",
+                "dtype": np.dtype(dtype).name,
+                "dim": field.params["dim"],
+            }
+
+        with open(path / MANIFEST_FILE, "w") as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        return manifest
+    finally:
+        for writer in writers.values():
+            writer.shutdown(wait=True)
+        for vector_file in vector_files.values():
+            vector_file.close()
+        documents_file.close()
+
+
+def import_collection(
+    mongo_collection: MongoCollection,
+    milvus_collection: MilvusCollection | None,
+    path: str | Path,
+    partition_name: str | None = None,
+    batch_size: int = 1000,
+    max_pending: int = 4,
+) -> int:
+    path = Path(path)
+    with open(path / MANIFEST_FILE) as manifest_file:
+        manifest = json.load(manifest_file)
+
+    if manifest["version"] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported export version: {manifest['version']}")
+
+    vectors = {
+        name: np.load(path / info["file"], mmap_mode="r")
+        for name, info in manifest["vector_fields"].items()
+    }
+    if vectors and milvus_collection is None:
+        raise ValueError("Export has vectors but the collection has no milvus side")
+
+    # Mongo writes of a batch overlap with the milvus insert of the next one
+    mongo_writer = ThreadPoolExecutor(max_workers=1)
+    pending: deque[Future] = deque()
+    count = 0
+
+    try:
+        with open(path / DOCUMENTS_FILE) as documents_file:
+            for lines in batched(documents_file, batch_size):
+                rows = [json_util.loads(line) for line in lines]
+                with_vectors = [row for row in rows if row["vector_row"] is not None]
+                if with_vectors:
+                    primary_keys = _insert_milvus_rows(
+                        milvus_collection, vectors, with_vectors, partition_name
+                    )
+                    for row, milvus_pk in zip(with_vectors, primary_keys):
+                        row["document"]["milvus_id"] = milvus_pk
+
+                documents = [row["document"] for row in rows]
+                pending.append(
+                    mongo_writer.submit(mongo_collection.insert_many, documents)
+                )
+                count += len(documents)
+
+                while len(pending) > max_pending:
+                    pending.popleft().result()
+
+        while pending:
+            pending.popleft().result()
+    finally:
+        mongo_writer.shutdown(wait=True)
+
+    return count
+
+
+def _split_schema(
+    milvus_collection: MilvusCollection | None,
+) -> tuple[FieldSchema | None, list[FieldSchema], list[FieldSchema]]:
+    if milvus_collection is None:
+        return None, [], []
+
+    pk_field, vector_fields, scalar_fields = None, [], []
+    for field in milvus_collection.schema.fields:
+        if field.is_primary:
+            pk_field = field
+        elif field.dtype in VECTOR_TYPES:
+            vector_fields.append(field)
+        else:
+            scalar_fields.append(field)
+
+    return pk_field, vector_fields, scalar_fields
+
+
+def _fetch_milvus_records(
+    milvus_collection: MilvusCollection | None,
+    pk_field: FieldSchema | None,
+    documents: list[dict],
+) -> dict:
+    milvus_ids = [
+        doc["milvus_id"] for doc in documents if doc.get("milvus_id") is not None
+    ]
+    if milvus_collection is None or not milvus_ids:
+        return {}
+
+    output_fields = [
+        field.name for field in milvus_collection.schema.fields if not field.is_primary
+    ]
+    records = milvus_collection.query(
+        milvus_in_expr(pk_field.name, milvus_ids), output_fields=output_fields
+    )
+    return {record[pk_field.name]: record for record in records}
+
+
+def _insert_milvus_rows(
+    milvus_collection: MilvusCollection,
+    vectors: dict[str, np.ndarray],
+    rows: list[dict],
+    partition_name: str | None,
+) -> list:
+    vector_rows = [row["vector_row"] for row in rows]
+    columns = []
+    for field in milvus_collection.schema.fields:
+        if field.is_primary:
+            if field.auto_id:
+                continue
+            columns.append([row["document"]["milvus_id"] for row in rows])
+        elif field.name in vectors:
+            block = vectors[field.name][vector_rows]
+            if field.dtype == DataType.BINARY_VECTOR:
+                columns.append([vector.tobytes() for vector in block])
+            else:
+                columns.append(block.tolist())
+        else:
+            columns.append([row["milvus"][field.name] for row in rows])
+
+    result = milvus_collection.insert(columns, partition_name)
+    return result.primary_keys
+
+
+def _vector_layout(field: FieldSchema) -> tuple[type, int]:
+    if field.dtype == DataType.BINARY_VECTOR:
+        return np.uint8, field.params["dim"] // 8
+    return np.float32, field.params["dim"]
+
+
+def _vector_bytes(field: FieldSchema, values: list) -> bytes:
+    if field.dtype == DataType.BINARY_VECTOR:
+        return b"".join(
+            value[0] if isinstance(value, list) else bytes(value) for value in values
+        )
+    return np.asarray(values, dtype=np.float32).tobytes()
+
+
+def _write_npy_header(file: IO[bytes], dtype: type, shape: tuple[int, int]) -> None:
+    header = repr(
+        {
+            "descr": np.lib.format.dtype_to_descr(np.dtype(dtype)),
+            "fortran_order": False,
+            "shape": shape,
+        }
+    )
+    # magic (6) + version (2) + header length (2) + header + newline
+    header = header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    file.seek(0)
+    file.write(
+        np.lib.format.magic(1, 0) + struct.pack("<H", len(header)) + header.encode()
+    )
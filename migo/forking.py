@@ -0,0 +1,28 @@
+import os
+import weakref
+from typing import Callable
+
+_HOOKS: list[Callable[[], None]] = []
+_RESOURCES: "weakref.WeakSet" = weakref.WeakSet()
+
+
+def on_fork(hook: Callable[[], None]) -> Callable[[], None]:
+    _HOOKS.append(hook)
+    return hook
+
+
+def track(resource) -> None:
+    # Tracked resources get their _after_fork called in every forked child
+    _RESOURCES.add(resource)
+
+
+def _after_fork_in_child() -> None:
+    # Threads do not survive a fork, and locks or queues they held are left
+    # in whatever state the parent had them in
+    for hook in _HOOKS:
+        hook()
+    for resource in list(_RESOURCES):
+        resource._after_fork()
+
+
+os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,68 @@
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from .rerank import HIGHER_IS_BETTER
+
+
+@dataclass
+class Fusion:
+    method: Literal["rrf", "weighted"] = "rrf"
+    weights: dict[str, float] | None = None
+    k: int = 60
+
+
+@dataclass
+class FusedHit:
+    id: Any
+    score: float
+    hits: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def distance(self) -> float:
+        return self.score
+
+
+def fuse(
+    fusion: Fusion,
+    legs: dict[str, list[list]],
+    metric_types: dict[str, str],
+    limit: int,
+) -> list[list[FusedHit]]:
+    weights = fusion.weights or {}
+    nq = max((len(ranked) for ranked in legs.values()), default=0)
+
+    fused = []
+    for query in range(nq):
+        hits: dict[Any, FusedHit] = {}
+        for field_name, ranked in legs.items():
+            leg = ranked[query] if query < len(ranked) else []
+            weight = weights.get(field_name, 1.0)
+            if fusion.method == "rrf":
+                scores = [1 / (fusion.k + rank) for rank in range(1, len(leg) + 1)]
+            else:
+                scores = _normalize(leg, metric_types[field_name])
+
+            for hit, score in zip(leg, scores):
+                fused_hit = hits.setdefault(hit.id, FusedHit(hit.id, 0.0))
+                fused_hit.score += weight * score
+                fused_hit.hits[field_name] = hit
+
+        ranking = sorted(hits.values(), key=lambda hit: hit.score, reverse=True)
+        fused.append(ranking[:limit] if limit else ranking)
+
+    return fused
+
+
+def _normalize(leg: list, metric_type: str) -> list[float]:
+    # Min-max per leg so distances of different metrics become comparable
+    if not leg:
+        return []
+
+    similarities = [
+        hit.distance if metric_type.upper() in HIGHER_IS_BETTER else -hit.distance
+        for hit in leg
+    ]
+    low, high = min(similarities), max(similarities)
+    if high == low:
+        return [1.0] * len(leg)
+    return [(similarity - low) / (high - low) for similarity in similarities]
@@ -0,0 +1,112 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+
+from pymilvus import Collection as MilvusCollection
+
+from .deadline import DeadlineExceeded
+from .forking import track
+
+
+class HedgedSearch:
+    def __init__(
+        self,
+        replicas: list[MilvusCollection],
+        percentile: float = 95.0,
+        min_delay: float = 0.005,
+        window: int = 1000,
+        max_workers: int = 16,
+    ) -> None:
+        self.__replicas = replicas
+        self.__percentile = percentile
+        self.__min_delay = min_delay
+        self.__latencies: deque[float] = deque(maxlen=window)
+        self.__max_workers = max_workers
+        self.__lock = threading.Lock()
+        self.__executor = self.__new_executor()
+        self.hedged = 0
+        self.hedge_wins = 0
+        track(self)
+
+    def delay(self) -> float:
+        with self.__lock:
+            latencies = sorted(self.__latencies)
+
+        if not latencies:
+            return self.__min_delay
+
+        index = min(int(len(latencies) * self.__percentile / 100), len(latencies) - 1)
+        return max(latencies[index], self.__min_delay)
+
+    def search(self, primary: MilvusCollection, timeout: float | None = None, **kwargs):
+        started = time.monotonic()
+        futures = {self.__submit(primary, timeout, kwargs): primary}
+
+        delay = self.delay()
+        if timeout is not None:
+            delay = min(delay, timeout)
+        done, _ = wait(futures, timeout=delay)
+
+        if not done and self.__replicas:
+            # The primary is slower than usual, race it against the replicas
+            remaining = (
+                None if timeout is None else timeout - (time.monotonic() - started)
+            )
+            for replica in self.__replicas:
+                futures[self.__submit(replica, remaining, kwargs)] = replica
+            self.hedged += 1
+
+        pending = set(futures)
+        error = None
+        while pending:
+            remaining = (
+                None if timeout is None else timeout - (time.monotonic() - started)
+            )
+            if remaining is not None and remaining <= 0:
+                break
+
+            done, pending = wait(
+                pending, timeout=remaining, return_when=FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+
+                for other in pending:
+                    other.cancel()
+                if futures[future] is not primary:
+                    self.hedge_wins += 1
+                return future.result()
+
+        if error is not None:
+            raise error
+        raise DeadlineExceeded(f"Search did not complete within {timeout}s")
+
+    def close(self) -> None:
+        self.__executor.shutdown(wait=False, cancel_futures=True)
+
+    def _after_fork(self) -> None:
+        self.__lock = threading.Lock()
+        self.__executor = self.__new_executor()
+
+    def __new_executor(self) -> ThreadPoolExecutor:
+        return ThreadPoolExecutor(
+            max_workers=self.__max_workers, thread_name_prefix="migo-hedge"
+        )
+
+    def __submit(
+        self, collection: MilvusCollection, timeout: float | None, kwargs: dict
+    ) -> Future:
+        return self.__executor.submit(self.__search, collection, timeout, kwargs)
+
+    def __search(
+        self, collection: MilvusCollection, timeout: float | None, kwargs: dict
+    ):
+        started = time.monotonic()
+        # The rpc timeout makes the server drop the losing requests
+        result = collection.search(timeout=timeout, **kwargs)
+        with self.__lock:
+            self.__latencies.append(time.monotonic() - started)
+        return result
@@ -0,0 +1,48 @@
+from typing import Any
+
+from bson import ObjectId
+from pymilvus import CollectionSchema, DataType
+
+INT64_MIN, INT64_MAX = -(2**63), 2**63 - 1
+PK_TYPES = {DataType.INT64: int, DataType.VARCHAR: str}
+
+
+def identity_pk_type(schema: CollectionSchema) -> type:
+    primary = schema.primary_field
+    if primary is None or primary.auto_id:
+        raise ValueError("Identity keys need a milvus pk without auto_id")
+    if primary.dtype not in PK_TYPES:
+        raise ValueError(
+            f"Identity keys need an INT64 or VARCHAR milvus pk, got {primary.dtype.name}"
+        )
+
+    return PK_TYPES[primary.dtype]
+
+
+def pk_from_id(mongo_id: Any, pk_type: type | None = None) -> int | str:
+    # ObjectIds map to their hex form in a VARCHAR pk and ints to an INT64
+    # pk, both of which map back without a lookup
+    milvus_pk = None
+    if isinstance(mongo_id, ObjectId):
+        milvus_pk = str(mongo_id)
+    elif isinstance(mongo_id, int) and not isinstance(mongo_id, bool):
+        if INT64_MIN <= mongo_id <= INT64_MAX:
+            milvus_pk = mongo_id
+
+    if milvus_pk is None or (
+        pk_type is not None and not isinstance(milvus_pk, pk_type)
+    ):
+        raise TypeError(f"Cannot derive a milvus primary key from _id: {mongo_id!r}")
+    return milvus_pk
+
+
+def pk_columns(schema: CollectionSchema, columns: list[list], pks: list) -> list[list]:
+    # The pk column goes where the schema has it, the rest keep their order
+    position = [field.name for field in schema.fields].index(schema.primary_field.name)
+    return [*columns[:position], pks, *columns[position:]]
+
+
+def id_from_pk(milvus_pk: int | str) -> Any:
+    if isinstance(milvus_pk, str):
+        return ObjectId(milvus_pk)
+    return milvus_pk
@@ -0,0 +1,88 @@
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+# Milvus caps offset + limit of a single search at this many results
+MAX_TOPK = 16384
+
+
+@dataclass
+class Page:
+    documents: list[dict]
+    cursor: str | None = None
+
+
+@dataclass
+class CursorState:
+    field_name: str
+    query: list
+    mongo_filter: dict
+    fields: list | None
+    search_param: dict | None
+    partition_names: list[str] | None
+    page_size: int
+    hits: list = field(default_factory=list)
+    seen: set = field(default_factory=set)
+    exhausted: bool = False
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class CursorCache:
+    def __init__(self, ttl: float = 300.0, max_size: int = 10000) -> None:
+        self.__ttl = ttl
+        self.__max_size = max_size
+        self.__lock = threading.Lock()
+        self.__entries: OrderedDict[str, tuple[float, CursorState, int]] = OrderedDict()
+
+    def put(self, state: CursorState, position: int) -> str:
+        # Every page gets its own token, so fetching one twice is harmless
+        token = secrets.token_urlsafe(16)
+        with self.__lock:
+            self.__evict()
+            self.__entries[token] = (time.monotonic() + self.__ttl, state, position)
+            while len(self.__entries) > self.__max_size:
+                self.__entries.popitem(last=False)
+
+        return token
+
+    def get(self, token: str) -> tuple[CursorState, int]:
+        with self.__lock:
+            self.__evict()
+            entry = self.__entries.get(token)
+            if entry is None:
+                raise KeyError(f"Cursor expired or unknown: {token}")
+
+            # Reading a cursor renews it for another page
+            _, state, position = entry
+            self.__entries[token] = (time.monotonic() + self.__ttl, state, position)
+            self.__entries.move_to_end(token)
+            return state, position
+
+    def discard(self, token: str) -> None:
+        with self.__lock:
+            self.__entries.pop(token, None)
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def __evict(self) -> None:
+        now = time.monotonic()
+        while self.__entries:
+            token, (expires, _, _) = next(iter(self.__entries.items()))
+            if expires > now:
+                return
+            del self.__entries[token]
+
+
+def with_offset(search_param: dict | None, offset: int) -> dict:
+    search_param = dict(search_param or {})
+    search_param["offset"] = offset
+    return search_param
+
+
+def rank_order(documents: list[dict], ids: list[Any]) -> list[dict]:
+    rank = {milvus_id: position for position, milvus_id in enumerate(ids)}
+    return sorted(documents, key=lambda document: rank[document["milvus_id"]])
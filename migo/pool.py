@@ -0,0 +1,153 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Iterable
+
+from .client import Client
+from .collection import Collection
+from .config import MilvusConfig, MongoConfig
+from .database import Database
+from .fusion import FusedHit
+from .rawbson import JoinedRawDocument, attach
+from .rerank import ExactHit
+from .utils import BatchDocument, batched
+
+POSTPROCESS_FUNCTION = Callable[[list[dict]], Any]
+
+_WORKER_CLIENT: Client | None = None
+_WORKER_DATABASE: Database | None = None
+_WORKER_COLLECTIONS: dict[str, Collection] = {}
+
+
+class ProcessPool:
+    def __init__(
+        self,
+        mongo_config: MongoConfig | dict,
+        milvus_config: MilvusConfig | dict,
+        database: str | None = None,
+        max_workers: int | None = None,
+        postprocess: POSTPROCESS_FUNCTION | None = None,
+        start_method: str | None = None,
+    ) -> None:
+        if isinstance(mongo_config, MongoConfig):
+            mongo_config = mongo_config.to_dict(remove_none=True)
+        if isinstance(milvus_config, MilvusConfig):
+            milvus_config = milvus_config.to_dict(remove_none=True)
+
+        self.__postprocess = postprocess
+        self.__executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_worker,
+            initargs=(mongo_config, milvus_config, database),
+        )
+
+    def find_many(
+        self,
+        collection: str,
+        requests: Iterable[dict],
+        chunk_size: int = 16,
+    ) -> list:
+        return self.map(
+            _find_many, collection, requests, self.__postprocess, chunk_size=chunk_size
+        )
+
+    def insert_many(
+        self,
+        collection: str,
+        batches: Iterable[BatchDocument],
+        partition_name: str | None = None,
+    ) -> list:
+        inserted_ids = []
+        for ids in self.map(
+            _insert_many, collection, batches, partition_name, chunk_size=1
+        ):
+            inserted_ids.extend(ids)
+        return inserted_ids
+
+    def map(
+        self,
+        function: Callable,
+        collection: str,
+        items: Iterable,
+        *args,
+        chunk_size: int = 16,
+    ) -> list:
+        # Items travel in chunks to amortize pickling and IPC per task
+        futures = [
+            self.__executor.submit(_run_chunk, function, collection, chunk, args)
+            for chunk in batched(items, chunk_size)
+        ]
+        results = []
+        for future in futures:
+            results.extend(future.result())
+        return results
+
+    def close(self, wait: bool = True) -> None:
+        self.__executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self) -> "ProcessPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def _init_worker(mongo_config: dict, milvus_config: dict, database: str | None):
+    global _WORKER_CLIENT, _WORKER_DATABASE
+    # Every worker opens its own connections instead of sharing the parent's
+    _WORKER_CLIENT = Client(mongo_config, milvus_config)
+    _WORKER_DATABASE = (
+        _WORKER_CLIENT.get_database(database)
+        if database is not None
+        else _WORKER_CLIENT.get_default_database()
+    )
+
+
+def _run_chunk(function: Callable, collection: str, chunk: list, args: tuple) -> list:
+    if collection not in _WORKER_COLLECTIONS:
+        _WORKER_COLLECTIONS[collection] = _WORKER_DATABASE.get_collection(collection)
+
+    collection = _WORKER_COLLECTIONS[collection]
+    return [function(collection, item, *args) for item in chunk]
+
+
+def _find_many(
+    collection: Collection, request: dict, postprocess: POSTPROCESS_FUNCTION | None
+) -> Any:
+    documents = collection.find_many(**request)
+    for document in documents:
+        if isinstance(document, JoinedRawDocument):
+            milvus_data = document.milvus_data
+        else:
+            milvus_data = document.get("milvus_data")
+        if milvus_data is not None:
+            attach(document, _plain_hit(milvus_data))
+
+    return documents if postprocess is None else postprocess(documents)
+
+
+def _insert_many(
+    collection: Collection, batch: BatchDocument, partition_name: str | None
+) -> list:
+    return list(collection.insert_many(batch, partition_name).inserted_ids)
+
+
+def _plain_hit(milvus_data: Any) -> Any:
+    # Search hits hold protobuf references that do not survive pickling, and
+    # rows from a milvus query are plain dicts already
+    if isinstance(milvus_data, dict):
+        return milvus_data
+
+    plain = {}
+    entity = getattr(milvus_data, "entity", None)
+    if entity is not None:
+        plain.update({name: entity.get(name) for name in entity.fields})
+    plain["id"] = milvus_data.id
+    plain["distance"] = milvus_data.distance
+    if isinstance(milvus_data, ExactHit):
+        plain["approximate_distance"] = milvus_data.approximate_distance
+    elif isinstance(milvus_data, FusedHit):
+        plain["hits"] = {
+            field_name: _plain_hit(hit) for field_name, hit in milvus_data.hits.items()
+        }
+    return plain
@@ -0,0 +1,100 @@
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Callable, Iterator, Literal
+
+import bson
+
+# Rough wire size of a single search hit (int64 id + float32 distance)
+HIT_BYTES = 12
+MONGO_FIRST_BATCH = 101
+MONGO_MAX_BATCH_BYTES = 16 * 1024 * 1024
+
+
+@dataclass
+class Stage:
+    name: str
+    backend: Literal["milvus", "mongo"]
+    command: dict
+    candidates_in: int = 0
+    candidates_out: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+    round_trips: int = 0
+    wall_time: float = 0.0
+    explain: dict | None = None
+
+
+@dataclass
+class QueryPlan:
+    operation: str
+    stages: list[Stage] = field(default_factory=list)
+    wall_time: float = 0.0
+
+    @property
+    def round_trips(self) -> int:
+        return sum(stage.round_trips for stage in self.stages)
+
+    @property
+    def bytes_transferred(self) -> int:
+        return sum(stage.bytes_sent + stage.bytes_received for stage in self.stages)
+
+
+class Profiler:
+    def __init__(self, operation: str, explain: bool = False) -> None:
+        self.explain = explain
+        self.__plan = QueryPlan(operation=operation)
+        self.__started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, backend: str, command: dict) -> Iterator[Stage]:
+        stage = Stage(name=name, backend=backend, command=command)
+        started = time.perf_counter()
+        try:
+            yield stage
+        finally:
+            stage.wall_time = time.perf_counter() - started
+            self.__plan.stages.append(stage)
+
+    def finish(self) -> QueryPlan:
+        self.__plan.wall_time = time.perf_counter() - self.__started
+        return self.__plan
+
+
+def profiled(method: Callable) -> Callable:
+    @wraps(method)
+    def wrapper(self, *args, profile: bool = False, **kwargs):
+        if not profile:
+            return method(self, *args, **kwargs)
+
+        profiler = Profiler(method.__name__)
+        result = method(self, *args, profiler=profiler, **kwargs)
+        return result, profiler.finish()
+
+    return wrapper
+
+
+def stage(
+    profiler: Profiler | None, name: str, backend: str, command: dict
+) -> Iterator[Stage]:
+    if profiler is None:
+        return nullcontext(Stage(name=name, backend=backend, command=command))
+    return profiler.stage(name, backend, command)
+
+
+def bson_size(documents: list[dict]) -> int:
+    return sum(len(bson.encode(document)) for document in documents)
+
+
+def vector_size(vectors: list) -> int:
+    return sum(
+        len(vector) if isinstance(vector, bytes) else 4 * len(vector)
+        for vector in vectors
+    )
+
+
+def mongo_round_trips(count: int, size: int) -> int:
+    if count <= MONGO_FIRST_BATCH:
+        return 1
+    return 1 + -(-size // MONGO_MAX_BATCH_BYTES)
@@ -0,0 +1,90 @@
+import struct
+from typing import Any
+
+import bson
+from bson.codec_options import DEFAULT_CODEC_OPTIONS
+from bson.raw_bson import RawBSONDocument
+
+_INT32 = struct.Struct("<i")
+# Sizes of the fixed width BSON element types, keyed by type byte
+_FIXED_SIZES = {
+    0x01: 8,
+    0x06: 0,
+    0x07: 12,
+    0x08: 1,
+    0x09: 8,
+    0x0A: 0,
+    0x10: 4,
+    0x11: 8,
+    0x12: 8,
+    0x13: 16,
+    0x7F: 0,
+    0xFF: 0,
+}
+# Types whose value starts with its own int32 length prefix
+_STRING_TYPES = {0x02, 0x0D, 0x0E}
+_DOCUMENT_TYPES = {0x03, 0x04, 0x0F}
+_MISSING = object()
+
+
+class JoinedRawDocument(RawBSONDocument):
+    milvus_data: Any = None
+
+    def __getitem__(self, item: str) -> Any:
+        if item == "milvus_data" and self.milvus_data is not None:
+            return self.milvus_data
+        return super().__getitem__(item)
+
+
+RAW_CODEC_OPTIONS = DEFAULT_CODEC_OPTIONS.with_options(document_class=JoinedRawDocument)
+
+
+def read_field(raw: bytes, name: str, default: Any = None) -> Any:
+    # Walk the top level elements and decode only the one that is asked for
+    target = name.encode() + b"\x00"
+    position, end = 4, _INT32.unpack_from(raw)[0] - 1
+    while position < end:
+        element_type = raw[position]
+        name_end = raw.index(b"\x00", position + 1) + 1
+        value_size = _value_size(raw, element_type, name_end)
+        element_end = name_end + value_size
+        if raw[position + 1 : name_end] == target:
+            element = raw[position:element_end]
+            document = _INT32.pack(len(element) + 5) + element + b"\x00"
+            return bson.decode(document)[name]
+
+        position = element_end
+
+    return default
+
+
+def milvus_id_of(document: dict | RawBSONDocument) -> Any:
+    if isinstance(document, RawBSONDocument):
+        return read_field(document.raw, "milvus_id")
+    return document.get("milvus_id", None)
+
+
+def attach(document: dict | JoinedRawDocument, milvus_data: Any) -> None:
+    if isinstance(document, JoinedRawDocument):
+        document.milvus_data = milvus_data
+    else:
+        document["milvus_data"] = milvus_data
+
+
+def _value_size(raw: bytes, element_type: int, position: int) -> int:
+    size = _FIXED_SIZES.get(element_type, _MISSING)
+    if size is not _MISSING:
+        return size
+    if element_type in _STRING_TYPES:
+        return 4 + _INT32.unpack_from(raw, position)[0]
+    if element_type in _DOCUMENT_TYPES:
+        return _INT32.unpack_from(raw, position)[0]
+    if element_type == 0x05:
+        return 5 + _INT32.unpack_from(raw, position)[0]
+    if element_type == 0x0B:
+        pattern_end = raw.index(b"\x00", position) + 1
+        return raw.index(b"\x00", pattern_end) + 1 - position
+    if element_type == 0x0C:
+        return 4 + _INT32.unpack_from(raw, position)[0] + 12
+
+    raise bson.InvalidBSON(f"Unknown BSON element type: {element_type:#x}")
@@ -0,0 +1,194 @@
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterator
+
+from pymilvus import DataType
+from pymongo import ASCENDING
+
+from .collection import Collection
+from .utils import batched, milvus_in_expr
+
+_END = object()
+
+
+@dataclass
+class ReconcileReport:
+    mongo_ids: int = 0
+    milvus_ids: int = 0
+    orphans: int = 0
+    deleted: int = 0
+    dangling: int = 0
+    dangling_sample: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class Reconciler:
+    def __init__(
+        self,
+        collection: Collection,
+        batch_size: int = 1000,
+        delete_orphans: bool = True,
+        max_deletes_per_second: float | None = None,
+        on_dangling: Callable[[list], None] | None = None,
+        sample_size: int = 100,
+    ) -> None:
+        self.__mongo_collection, self.__milvus_collection = collection.get_drivers()
+        self.__pk_field = self.__milvus_collection.schema.primary_field
+        self.__batch_size = batch_size
+        self.__delete_orphans = delete_orphans
+        self.__max_deletes_per_second = max_deletes_per_second
+        self.__on_dangling = on_dangling
+        self.__sample_size = sample_size
+
+    def run(self) -> ReconcileReport:
+        report = ReconcileReport()
+        started = time.monotonic()
+
+        orphans, dangling = [], []
+        for kind, milvus_id in self.__diff(report):
+            if kind == "orphan":
+                orphans.append(milvus_id)
+                if len(orphans) >= self.__batch_size:
+                    self.__handle_orphans(orphans, report)
+                    orphans = []
+            else:
+                dangling.append(milvus_id)
+                if len(dangling) >= self.__batch_size:
+                    self.__handle_dangling(dangling, report)
+                    dangling = []
+
+        if orphans:
+            self.__handle_orphans(orphans, report)
+        if dangling:
+            self.__handle_dangling(dangling, report)
+
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def __diff(self, report: ReconcileReport) -> Iterator[tuple[str, Any]]:
+        # Both sides arrive sorted, so a single merge pass finds the
+        # differences while holding no more than a batch of each in memory
+        mongo_ids = _distinct(self.__mongo_ids())
+        milvus_ids = _distinct(self.__milvus_ids())
+
+        mongo_id, milvus_id = next(mongo_ids, _END), next(milvus_ids, _END)
+        while mongo_id is not _END or milvus_id is not _END:
+            if milvus_id is _END or (mongo_id is not _END and mongo_id < milvus_id):
+                yield "dangling", mongo_id
+                report.mongo_ids += 1
+                mongo_id = next(mongo_ids, _END)
+            elif mongo_id is _END or milvus_id < mongo_id:
+                yield "orphan", milvus_id
+                report.milvus_ids += 1
+                milvus_id = next(milvus_ids, _END)
+            else:
+                report.mongo_ids += 1
+                report.milvus_ids += 1
+                mongo_id, milvus_id = next(mongo_ids, _END), next(milvus_ids, _END)
+
+    def __mongo_ids(self) -> Iterator:
+        cursor = self.__mongo_collection.find(
+            {"milvus_id": {"$ne": None}},
+            projection={"_id": False, "milvus_id": True},
+            sort=[("milvus_id", ASCENDING)],
+            batch_size=self.__batch_size,
+            allow_disk_use=True,
+        )
+        for document in cursor:
+            yield document["milvus_id"]
+
+    def __milvus_ids(self) -> Iterator:
+        pk_name = self.__pk_field.name
+        if hasattr(self.__milvus_collection, "query_iterator"):
+            iterator = self.__milvus_collection.query_iterator(
+                batch_size=self.__batch_size, output_fields=[pk_name]
+            )
+            try:
+                while records := iterator.next():
+                    yield from sorted(record[pk_name] for record in records)
+            finally:
+                iterator.close()
+            return
+
+        # Older servers have no iterator. A query with a limit returns any
+        # subset of its matches, so only a pk window that comes back short is
+        # known to be complete. Full windows are split at the median of what
+        # they returned and retried, leftmost first to keep the output sorted.
+        limit = max(self.__batch_size, 2)
+        lowest = -(2**63) if self.__pk_field.dtype == DataType.INT64 else ""
+        windows = [(lowest, None)]
+        while windows:
+            low, high = windows.pop()
+            expr = f"{pk_name} >= {json.dumps(low)}"
+            if high is not None:
+                expr += f" and {pk_name} < {json.dumps(high)}"
+
+            records = self.__milvus_collection.query(
+                expr, output_fields=[pk_name], limit=limit
+            )
+            page = sorted(record[pk_name] for record in records)
+            if len(page) < limit:
+                yield from page
+                continue
+
+            middle = page[len(page) // 2]
+            windows.append((middle, high))
+            windows.append((low, middle))
+
+    def __handle_orphans(self, orphans: list, report: ReconcileReport) -> None:
+        # Skip vectors whose document was written after the scan went past it
+        referenced = {
+            document["milvus_id"]
+            for document in self.__mongo_collection.find(
+                {"milvus_id": {"$in": orphans}},
+                projection={"_id": False, "milvus_id": True},
+            )
+        }
+        orphans = [milvus_id for milvus_id in orphans if milvus_id not in referenced]
+        report.orphans += len(orphans)
+        if not self.__delete_orphans or not orphans:
+            return
+
+        pk_name = self.__pk_field.name
+        chunk_size = self.__batch_size
+        if self.__max_deletes_per_second:
+            chunk_size = max(1, min(chunk_size, int(self.__max_deletes_per_second)))
+
+        for chunk in batched(orphans, chunk_size):
+            started = time.monotonic()
+            result = self.__milvus_collection.delete(milvus_in_expr(pk_name, chunk))
+            report.deleted += result.delete_count
+
+            if self.__max_deletes_per_second:
+                budget = len(chunk) / self.__max_deletes_per_second
+                elapsed = time.monotonic() - started
+                if budget > elapsed:
+                    time.sleep(budget - elapsed)
+
+    def __handle_dangling(self, dangling: list, report: ReconcileReport) -> None:
+        pk_name = self.__pk_field.name
+        existing = {
+            record[pk_name]
+            for record in self.__milvus_collection.query(
+                milvus_in_expr(pk_name, dangling), output_fields=[pk_name]
+            )
+        }
+        dangling = [milvus_id for milvus_id in dangling if milvus_id not in existing]
+        if not dangling:
+            return
+
+        report.dangling += len(dangling)
+        free = self.__sample_size - len(report.dangling_sample)
+        if free > 0:
+            report.dangling_sample.extend(dangling[:free])
+        if self.__on_dangling is not None:
+            self.__on_dangling(dangling)
+
+
+def _distinct(values: Iterator) -> Iterator:
+    previous = _END
+    for value in values:
+        if value != previous:
+            yield value
+            previous = value
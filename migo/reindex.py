@@ -0,0 +1,334 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable
+
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+
+from .config import MilvusCollectionConfig
+from .database import Database
+from .identity import identity_pk_type, pk_columns, pk_from_id
+from .utils import Index, batched, milvus_in_expr
+
+EMBEDDER = Callable[[list[dict]], list[list]]
+# Updates that only move milvus_id, like the swap's own $merge, change
+# nothing that needs embedding again
+_CONTENT_CHANGES = [
+    {
+        "$match": {
+            "$or": [
+                {"operationType": {"$in": ["insert", "replace", "delete"]}},
+                {
+                    "operationType": "update",
+                    "updateDescription.removedFields.0": {"$exists": True},
+                },
+                {
+                    "operationType": "update",
+                    "$expr": {
+                        "$gt": [
+                            {
+                                "$size": {
+                                    "$setDifference": [
+                                        {
+                                            "$map": {
+                                                "input": {
+                                                    "$objectToArray": "$updateDescription.updatedFields"
+                                                },
+                                                "in": "$$this.k",
+                                            }
+                                        },
+                                        ["milvus_id"],
+                                    ]
+                                }
+                            },
+                            0,
+                        ]
+                    },
+                },
+            ]
+        }
+    }
+]
+
+
+@dataclass
+class ReindexProgress:
+    processed: int
+    total: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        return self.processed / self.elapsed if self.elapsed else 0.0
+
+
+class Reindexer:
+    def __init__(
+        self,
+        database: Database,
+        name: str,
+        embedder: EMBEDDER,
+        milvus_config: MilvusCollectionConfig | dict,
+        indexes: list[Index] | None = None,
+        filter: dict | None = None,
+        projection: dict | None = None,
+        batch_size: int = 256,
+        workers: int | None = None,
+        max_rate: float | None = None,
+        on_progress: Callable[[ReindexProgress], None] | None = None,
+    ) -> None:
+        self.__database = database
+        self.__name = name
+        self.__shadow_name = None
+        self.__embedder = embedder
+        self.__milvus_config = milvus_config
+        self.__indexes = indexes or []
+        self.__filter = filter or {}
+        self.__projection = projection
+        self.__batch_size = batch_size
+        self.__workers = workers
+        self.__max_rate = max_rate
+        self.__on_progress = on_progress
+
+    @property
+    def shadow_name(self) -> str:
+        if self.__shadow_name is None:
+            # An unfinished job left its mapping collection behind, pick it up
+            # again instead of starting over
+            mongo_database, _ = self.__database.get_drivers()
+            prefix = f"{self.__name}_reindex_"
+            in_progress = sorted(
+                name
+                for name in mongo_database.list_collection_names()
+                if name.startswith(prefix)
+            )
+            self.__shadow_name = (
+                in_progress[-1] if in_progress else f"{prefix}{int(time.time())}"
+            )
+
+        return self.__shadow_name
+
+    def run(self) -> ReindexProgress:
+        self.__check_swappable()
+        progress = self.build()
+        self.swap()
+        return progress
+
+    def build(self) -> ReindexProgress:
+        mongo_database, _ = self.__database.get_drivers()
+        if self.shadow_name not in mongo_database.list_collection_names():
+            self.__database.create_collection(self.shadow_name, self.__milvus_config)
+
+        shadow = self.__database.get_collection(self.shadow_name)
+        shadow_mongo, shadow_milvus = shadow.get_drivers()
+        source = mongo_database[self.__name]
+
+        checkpoints = mongo_database["migo_reindex"]
+        if checkpoints.find_one({"_id": self.shadow_name}) is None:
+            # Writes that land while building are replayed from here on swap
+            with source.watch() as stream:
+                checkpoints.insert_one(
+                    {"_id": self.shadow_name, "token": stream.resume_token}
+                )
+
+        # The shadow mongo collection maps source _id to the new milvus pk. It
+        # is written in _id order, so the last entry is where to resume from.
+        mongo_filter = dict(self.__filter)
+        last = shadow_mongo.find_one({}, sort=[("_id", DESCENDING)])
+        if last is not None:
+            mongo_filter = {"$and": [mongo_filter, {"_id": {"$gt": last["_id"]}}]}
+
+        progress = ReindexProgress(
+            processed=shadow_mongo.estimated_document_count(),
+            total=source.count_documents(self.__filter),
+            elapsed=0.0,
+        )
+        cursor = source.find(
+            mongo_filter,
+            projection=self.__projection,
+            sort=[("_id", ASCENDING)],
+            batch_size=self.__batch_size,
+        )
+
+        workers = self.__workers or os.cpu_count() or 1
+        started = time.monotonic()
+        resumed_from = progress.processed
+        pending: deque[tuple[list, Future]] = deque()
+
+        def store_next():
+            ids, future = pending.popleft()
+            self.__store(shadow_mongo, shadow_milvus, ids, future.result())
+            progress.processed += len(ids)
+            progress.elapsed = time.monotonic() - started
+            if self.__max_rate:
+                ahead = (progress.processed - resumed_from) / self.__max_rate
+                if ahead > progress.elapsed:
+                    time.sleep(ahead - progress.elapsed)
+                    progress.elapsed = time.monotonic() - started
+            if self.__on_progress is not None:
+                self.__on_progress(progress)
+
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for documents in batched(cursor, self.__batch_size):
+                ids = [document["_id"] for document in documents]
+                pending.append((ids, pool.submit(self.__embedder, documents)))
+                while len(pending) >= 2 * workers:
+                    store_next()
+
+            while pending:
+                store_next()
+
+        shadow_milvus.flush()
+        if self.__indexes:
+            shadow.create_indexes(self.__indexes)
+        shadow_milvus.load()
+
+        return progress
+
+    def swap(self) -> None:
+        self.__check_swappable()
+        mongo_database, (_, milvus_handler) = self.__database.get_drivers()
+        shadow = self.__database.get_collection(self.shadow_name)
+        shadow_mongo, shadow_milvus = shadow.get_drivers()
+        source = mongo_database[self.__name]
+        checkpoint = mongo_database["migo_reindex"].find_one({"_id": self.shadow_name})
+        self.__catch_up(
+            source,
+            shadow_mongo,
+            shadow_milvus,
+            None if checkpoint is None else checkpoint["token"],
+        )
+
+        # Writes from here until the flip still reach the old collection,
+        # they are replayed into the new one once it has taken over
+        with source.watch(_CONTENT_CHANGES) as stream:
+            token = stream.resume_token
+
+        # Repoint every document server side in a single command, then flip
+        # the milvus name right after to keep the inconsistent window short
+        shadow_mongo.aggregate(
+            [
+                {
+                    "$merge": {
+                        "into": self.__name,
+                        "on": "_id",
+                        "whenMatched": [{"$set": {"milvus_id": "$$new.milvus_id"}}],
+                        "whenNotMatched": "discard",
+                    }
+                }
+            ]
+        )
+
+        current = milvus_handler.describe_collection(self.__name)["collection_name"]
+        if current == self.__name:
+            # A real collection owns the name, it must go before an alias can
+            # take its place
+            milvus_handler.drop_collection(current)
+            milvus_handler.create_alias(self.shadow_name, self.__name)
+        else:
+            milvus_handler.alter_alias(self.shadow_name, self.__name)
+            milvus_handler.drop_collection(current)
+
+        self.__catch_up(source, shadow_mongo, shadow_milvus, token, repoint=True)
+        shadow_mongo.drop()
+        mongo_database["migo_reindex"].delete_one({"_id": self.shadow_name})
+        self.__shadow_name = None
+
+    def __check_swappable(self) -> None:
+        if self.__filter:
+            # The old collection is dropped on swap, documents left out by the
+            # filter would lose their vectors
+            raise ValueError("A filtered reindex cannot be swapped in")
+
+    def __catch_up(
+        self, source, shadow_mongo, shadow_milvus, token, repoint: bool = False
+    ) -> None:
+        changed = set()
+
+        last = (
+            None if repoint else shadow_mongo.find_one({}, sort=[("_id", DESCENDING)])
+        )
+        if last is not None:
+            changed.update(
+                document["_id"]
+                for document in source.find(
+                    {"_id": {"$gt": last["_id"]}}, projection={"_id": True}
+                )
+            )
+
+        if token is not None:
+            with source.watch(_CONTENT_CHANGES, resume_after=token) as stream:
+                while True:
+                    event = stream.try_next()
+                    if event is None:
+                        break
+                    changed.add(event["documentKey"]["_id"])
+
+        pk_name = shadow_milvus.schema.primary_field.name
+        for ids in batched(changed, self.__batch_size):
+            # Drop what the build stored for these and embed them again as
+            # they are now, deleted documents simply are not found
+            stale = {
+                mapping["milvus_id"]
+                for mapping in shadow_mongo.find({"_id": {"$in": ids}})
+            }
+            if repoint:
+                # Writes after the merge may have left pointers of their own
+                stale.update(
+                    document["milvus_id"]
+                    for document in source.find(
+                        {"_id": {"$in": ids}, "milvus_id": {"$ne": None}},
+                        projection={"milvus_id": True},
+                    )
+                )
+            if stale:
+                shadow_milvus.delete(milvus_in_expr(pk_name, stale))
+                shadow_mongo.delete_many({"_id": {"$in": ids}})
+
+            documents = list(
+                source.find({"_id": {"$in": ids}}, projection=self.__projection)
+            )
+            if not documents:
+                continue
+
+            ids = [document["_id"] for document in documents]
+            milvus_pks = self.__store(
+                shadow_mongo, shadow_milvus, ids, self.__embedder(documents)
+            )
+            if repoint:
+                source.bulk_write(
+                    [
+                        UpdateOne({"_id": _id}, {"$set": {"milvus_id": milvus_pk}})
+                        for _id, milvus_pk in zip(ids, milvus_pks)
+                    ],
+                    ordered=False,
+                )
+
+    def __store(self, shadow_mongo, shadow_milvus, ids: list, vectors: list) -> list:
+        if len(vectors) != len(ids):
+            raise ValueError(
+                f"Embedder returned {len(vectors)} vectors for {len(ids)} documents"
+            )
+
+        # Only the pk and the vector are written, partitions and scalar fields
+        # of the old collection are not carried over
+        columns = [vectors]
+        if not shadow_milvus.schema.primary_field.auto_id:
+            # Only a collection with identity keys has a pk without auto_id,
+            # its vectors are stored under the pk derived from each _id
+            pk_type = identity_pk_type(shadow_milvus.schema)
+            columns = pk_columns(
+                shadow_milvus.schema,
+                columns,
+                [pk_from_id(_id, pk_type) for _id in ids],
+            )
+        result = shadow_milvus.insert(columns)
+        shadow_mongo.insert_many(
+            [
+                {"_id": _id, "milvus_id": milvus_pk}
+                for _id, milvus_pk in zip(ids, result.primary_keys)
+            ]
+        )
+        return result.primary_keys
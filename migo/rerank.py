@@ -0,0 +1,85 @@
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+
+HIGHER_IS_BETTER = {"IP", "COSINE"}
+BINARY_METRICS = {"HAMMING", "JACCARD", "TANIMOTO"}
+
+
+@dataclass
+class ExactHit:
+    id: Any
+    distance: float
+    approximate_distance: float
+    hit: Any = None
+
+    @property
+    def score(self) -> float:
+        return self.distance
+
+    @property
+    def entity(self) -> Any:
+        # Output fields requested from milvus live on the original hit
+        return None if self.hit is None else self.hit.entity
+
+
+def as_matrix(vectors: list, binary: bool = False) -> np.ndarray:
+    if not binary:
+        return np.asarray(vectors, dtype=np.float32)
+
+    rows = [vector[0] if isinstance(vector, list) else vector for vector in vectors]
+    return np.frombuffer(b"".join(rows), dtype=np.uint8).reshape(len(rows), -1)
+
+
+def exact_distances(
+    metric_type: str, queries: np.ndarray, vectors: np.ndarray
+) -> np.ndarray:
+    metric_type = metric_type.upper()
+    if metric_type == "L2":
+        # Milvus reports squared euclidean distances
+        return (
+            np.einsum("ij,ij->i", queries, queries)[:, None]
+            - 2 * queries @ vectors.T
+            + np.einsum("ij,ij->i", vectors, vectors)[None, :]
+        )
+    if metric_type == "IP":
+        return queries @ vectors.T
+    if metric_type == "COSINE":
+        queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+        return queries @ vectors.T
+    if metric_type in BINARY_METRICS:
+        queries = np.unpackbits(queries, axis=1).astype(np.float32)
+        vectors = np.unpackbits(vectors, axis=1).astype(np.float32)
+        common = queries @ vectors.T
+        total = queries.sum(axis=1)[:, None] + vectors.sum(axis=1)[None, :]
+        if metric_type == "HAMMING":
+            return total - 2 * common
+        return 1 - common / np.maximum(total - common, 1)
+
+    raise ValueError(f"Unsupported metric type for reranking: {metric_type}")
+
+
+def rerank(
+    metric_type: str,
+    queries: np.ndarray,
+    candidates: list[list],
+    vectors: dict[Any, np.ndarray],
+    limit: int,
+) -> list[list[tuple[Any, float]]]:
+    descending = metric_type.upper() in HIGHER_IS_BETTER
+    ranked = []
+    for query, ids in zip(queries, candidates):
+        ids = [milvus_id for milvus_id in ids if milvus_id in vectors]
+        if not ids:
+            ranked.append([])
+            continue
+
+        distances = exact_distances(
+            metric_type, query[None, :], np.stack([vectors[i] for i in ids])
+        )[0]
+        order = np.argsort(-distances if descending else distances, kind="stable")
+        ranked.append([(ids[i], float(distances[i])) for i in order[:limit]])
+
+    return ranked
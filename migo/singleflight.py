@@ -0,0 +1,95 @@
+import asyncio
+import copy
+import hashlib
+import pickle
+import threading
+from concurrent import futures
+from concurrent.futures import Future
+from typing import Any, Callable, Hashable, TypeVar
+
+from .deadline import DeadlineExceeded
+from .forking import track
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self.__lock = threading.Lock()
+        self.__calls: dict[Hashable, list] = {}
+        self.calls = 0
+        self.coalesced = 0
+        track(self)
+
+    @property
+    def coalescing_rate(self) -> float:
+        return self.coalesced / self.calls if self.calls else 0.0
+
+    def do(
+        self, key: Hashable, function: Callable[[], T], timeout: float | None = None
+    ) -> T:
+        future, leader = self.__join(key)
+        if leader:
+            return self.__lead(key, future, function)
+
+        # Waiting rather than result(timeout) keeps the leader's own timeout
+        # errors apart from this caller running out of time
+        done, _ = futures.wait([future], timeout=timeout)
+        if not done:
+            raise DeadlineExceeded(f"Coalesced call did not complete within {timeout}s")
+        return copy.deepcopy(future.result())
+
+    async def do_async(
+        self, key: Hashable, function: Callable[[], T], timeout: float | None = None
+    ) -> T:
+        future, leader = self.__join(key)
+        if leader:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.__lead, key, future, function)
+
+        # Unlike wait_for, wait leaves the shared call running on a timeout
+        waiter = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait([waiter], timeout=timeout)
+        if not done:
+            raise DeadlineExceeded(f"Coalesced call did not complete within {timeout}s")
+        return copy.deepcopy(waiter.result())
+
+    def _after_fork(self) -> None:
+        # Leaders of the inherited calls run in the parent, their futures
+        # would never complete here
+        self.__lock = threading.Lock()
+        self.__calls = {}
+
+    def __join(self, key: Hashable) -> tuple[Future, bool]:
+        with self.__lock:
+            self.calls += 1
+            call = self.__calls.get(key)
+            if call is not None:
+                call[1] += 1
+                self.coalesced += 1
+                return call[0], False
+
+            future = Future()
+            self.__calls[key] = [future, 0]
+            return future, True
+
+    def __lead(self, key: Hashable, future: Future, function: Callable[[], T]) -> T:
+        try:
+            result = function()
+        except BaseException as e:
+            with self.__lock:
+                self.__calls.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self.__lock:
+            _, followers = self.__calls.pop(key)
+        future.set_result(result)
+
+        # Followers copy the shared result, so the leader may only hand out
+        # the original when nobody else is going to read it
+        return copy.deepcopy(result) if followers else result
+
+
+def request_key(*args: Any) -> bytes:
+    return hashlib.blake2b(pickle.dumps(args), digest_size=16).digest()
@@ -0,0 +1,221 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from pymongo import UpdateOne
+from pymongo.collection import Collection as MongoCollection
+
+from .collection import Collection
+from .identity import identity_pk_type, pk_columns, pk_from_id
+from .utils import milvus_in_expr
+
+VECTORIZE_FUNCTION = Callable[[list[dict]], list[list[float]]]
+
+
+@dataclass
+class SyncMetrics:
+    events: int = 0
+    batches: int = 0
+    deleted: int = 0
+    inserted: int = 0
+    unresolved: int = 0
+    errors: int = 0
+    last_batch_size: int = 0
+    max_batch_size: int = 0
+    lag: float = 0.0
+
+    @property
+    def average_batch_size(self) -> float:
+        return self.events / self.batches if self.batches else 0.0
+
+
+class MilvusSync:
+    def __init__(
+        self,
+        collection: Collection,
+        vectorize: VECTORIZE_FUNCTION | None = None,
+        content_fields: list[str] | None = None,
+        batch_size: int = 512,
+        max_lag: float = 1.0,
+        checkpoint: MongoCollection | None = None,
+        name: str | None = None,
+        retry_delay: float = 1.0,
+    ) -> None:
+        self.__collection = collection
+        self.__mongo_collection, self.__milvus_collection = collection.get_drivers()
+        self.__pk_type = None
+        if collection.identity_keys:
+            # Vectors are stored under a pk derived from each _id
+            self.__pk_type = identity_pk_type(self.__milvus_collection.schema)
+        self.__vectorize = vectorize
+        self.__content_fields = set(content_fields or [])
+        self.__batch_size = batch_size
+        self.__max_lag = max_lag
+        self.__checkpoint = (
+            checkpoint
+            if checkpoint is not None
+            else self.__mongo_collection.database["migo_sync"]
+        )
+        self.__name = name or self.__mongo_collection.name
+        self.__retry_delay = retry_delay
+        self.__stop = threading.Event()
+        self.__thread: threading.Thread | None = None
+        self.metrics = SyncMetrics()
+
+    def start(self) -> None:
+        if self.__thread is not None and self.__thread.is_alive():
+            return
+
+        self.__stop.clear()
+        self.__thread = threading.Thread(target=self.run, daemon=True)
+        self.__thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        self.__stop.set()
+        if self.__thread is not None:
+            self.__thread.join(timeout)
+            self.__thread = None
+
+    def run(self) -> None:
+        checkpoint = self.__checkpoint.find_one({"_id": self.__name})
+        watch_options = {
+            "full_document": "updateLookup",
+            # Deletes only carry the _id, the pre-image is the only way to
+            # know which vector went away (needs changeStreamPreAndPostImages)
+            "full_document_before_change": "whenAvailable",
+            "max_await_time_ms": max(int(self.__max_lag * 500), 1),
+        }
+        if checkpoint is not None:
+            watch_options["resume_after"] = checkpoint["token"]
+
+        with self.__collection.watch(**watch_options) as stream:
+            pending = []
+            first_pending = 0.0
+            while not self.__stop.is_set() and stream.alive:
+                event = stream.try_next()
+                if event is not None:
+                    if not pending:
+                        first_pending = time.monotonic()
+                    pending.append(event)
+                    if event["operationType"] in ("drop", "rename", "invalidate"):
+                        self.__stop.set()
+
+                if not pending:
+                    self.metrics.lag = 0.0
+                    continue
+
+                if (
+                    len(pending) >= self.__batch_size
+                    or time.monotonic() - first_pending >= self.__max_lag
+                    or self.__stop.is_set()
+                ):
+                    self.__flush(pending)
+                    self.__checkpoint.replace_one(
+                        {"_id": self.__name},
+                        {"_id": self.__name, "token": stream.resume_token},
+                        upsert=True,
+                    )
+                    pending = []
+
+    def __flush(self, events: list[dict]) -> None:
+        while True:
+            try:
+                self.__apply(events)
+                break
+            except Exception as e:
+                self.metrics.errors += 1
+                logging.error(f"Exception ocurred while syncing milvus:\n{str(e)}")
+                if self.__stop.wait(self.__retry_delay):
+                    raise
+
+        self.metrics.events += len(events)
+        self.metrics.batches += 1
+        self.metrics.last_batch_size = len(events)
+        self.metrics.max_batch_size = max(self.metrics.max_batch_size, len(events))
+        cluster_time = events[-1].get("clusterTime")
+        if cluster_time is not None:
+            self.metrics.lag = max(time.time() - cluster_time.time, 0.0)
+
+    def __apply(self, events: list[dict]) -> None:
+        stale_ids = set()
+        to_vectorize: dict = {}
+
+        for event in events:
+            operation = event["operationType"]
+            if operation not in ("insert", "update", "replace", "delete"):
+                continue
+
+            _id = event["documentKey"]["_id"]
+            before = event.get("fullDocumentBeforeChange")
+            after = event.get("fullDocument")
+            old_milvus_id = before.get("milvus_id") if before else None
+            new_milvus_id = after.get("milvus_id") if after else None
+
+            if operation == "delete" and self.__pk_type is not None:
+                # The pk follows from the _id, no pre-image needed
+                stale_ids.add(pk_from_id(_id, self.__pk_type))
+            elif operation in ("delete", "update", "replace") and before is None:
+                if operation == "delete":
+                    self.metrics.unresolved += 1
+            elif old_milvus_id is not None and old_milvus_id != new_milvus_id:
+                # The document no longer points at its previous vector
+                stale_ids.add(old_milvus_id)
+
+            if after is None or self.__vectorize is None:
+                to_vectorize.pop(_id, None)
+            elif operation == "insert" and new_milvus_id is None:
+                to_vectorize[_id] = after
+            elif operation == "update" and self.__touches_content(event):
+                if new_milvus_id is not None:
+                    stale_ids.add(new_milvus_id)
+                to_vectorize[_id] = after
+
+        pk_name = self.__milvus_collection.schema.primary_field.name
+        if stale_ids:
+            result = self.__milvus_collection.delete(milvus_in_expr(pk_name, stale_ids))
+            self.metrics.deleted += result.delete_count
+
+        if to_vectorize:
+            self.__insert(pk_name, list(to_vectorize.values()))
+
+    def __insert(self, pk_name: str, documents: list[dict]) -> None:
+        columns = [self.__vectorize(documents)]
+        if self.__pk_type is not None:
+            columns = pk_columns(
+                self.__milvus_collection.schema,
+                columns,
+                [pk_from_id(document["_id"], self.__pk_type) for document in documents],
+            )
+        result = self.__milvus_collection.insert(columns)
+        self.metrics.inserted += result.insert_count
+
+        # Only repoint documents that did not change since they were read
+        self.__mongo_collection.bulk_write(
+            [
+                UpdateOne(
+                    {"_id": document["_id"], "milvus_id": document.get("milvus_id")},
+                    {"$set": {"milvus_id": milvus_pk}},
+                )
+                for document, milvus_pk in zip(documents, result.primary_keys)
+            ],
+            ordered=False,
+        )
+
+        referenced = {
+            document["milvus_id"]
+            for document in self.__mongo_collection.find(
+                {"milvus_id": {"$in": list(result.primary_keys)}},
+                projection={"milvus_id": True},
+            )
+        }
+        unreferenced = [pk for pk in result.primary_keys if pk not in referenced]
+        if unreferenced:
+            self.__milvus_collection.delete(milvus_in_expr(pk_name, unreferenced))
+
+    def __touches_content(self, event: dict) -> bool:
+        description = event.get("updateDescription") or {}
+        changed = set(description.get("updatedFields", {}))
+        changed.update(description.get("removedFields", []))
+        return any(field.split(".")[0] in self.__content_fields for field in changed)
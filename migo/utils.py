@@ -1,8 +1,19 @@
+import json
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Callable, Generic, Literal, Optional, TypeVar, Union
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Iterable,
+    Literal,
+    Optional,
+    TypeVar,
+    Union,
+)
 
 import pymongo
+from pymilvus import DataType
 
 F = TypeVar("F", bound=Callable[..., Any])
 
@@ -143,24 +154,46 @@ class Field:
 class Filter:
     mongo_filter: dict | None = None
     milvus_filter: dict[str, list] | None = None
+    milvus_content: dict[str, list] | None = None
 
 
 @dataclass
 class Document:
     mongo_document: dict
     milvus_array: list | None = None
+    content: Any = None
 
 
 @dataclass
 class BatchDocument:
     mongo_documents: list[dict]
     milvus_arrays: list[list] | None = None
+    contents: list | None = None
 
 
 @dataclass
 class Index:
-    mongo_index: Union[MongoIndex, MongoGeoIndex]
+    mongo_index: Optional[Union[MongoIndex, MongoGeoIndex]]
     milvus_indexes: list[Union[
         MilvusFloatingIndex,
         MilvusBinaryIndex,
     ]]
+
+
+VECTOR_TYPES = (DataType.FLOAT_VECTOR, DataType.BINARY_VECTOR)
+
+
+def milvus_in_expr(field_name: str, values: Iterable) -> str:
+    return f"{field_name} in {json.dumps(list(values))}"
+
+
+def batched(iterable: Iterable, size: int) -> Iterable[list]:
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+
+    if batch:
+        yield batch
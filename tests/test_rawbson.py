@@ -0,0 +1,110 @@
+import datetime
+import struct
+import uuid
+
+import bson
+import pytest
+from bson import Code, Decimal128, Int64, MaxKey, MinKey, ObjectId, Regex, Timestamp
+from bson.binary import Binary, UuidRepresentation
+from bson.codec_options import CodecOptions
+from bson.dbref import DBRef
+
+from migo.rawbson import JoinedRawDocument, attach, milvus_id_of, read_field
+
+OBJECT_ID = ObjectId("5f1d7f5e9b1e8b3a4c2d1e0f")
+
+
+def _element(name: str, value) -> bytes:
+    codec_options = CodecOptions(uuid_representation=UuidRepresentation.STANDARD)
+    return bson.encode({name: value}, codec_options=codec_options)[4:-1]
+
+
+def _raw(name: str, element_type: int, payload: bytes) -> bytes:
+    return bytes([element_type]) + name.encode() + b"\x00" + payload
+
+
+def _string(value: str) -> bytes:
+    encoded = value.encode() + b"\x00"
+    return struct.pack("<i", len(encoded)) + encoded
+
+
+def _document(*elements: bytes) -> bytes:
+    body = b"".join(elements)
+    return struct.pack("<i", len(body) + 5) + body + b"\x00"
+
+
+ELEMENTS = {
+    "double": _element("value", 1.5),
+    "string": _element("value", "héllo"),
+    "document": _element("value", {"nested": {"milvus_id": 7}}),
+    "array": _element("value", [1, "two", {"three": 3}]),
+    "binary": _element("value", Binary(b"\x00\x01\x02", 0x80)),
+    "uuid": _element("value", uuid.UUID(int=1)),
+    "undefined": _raw("value", 0x06, b""),
+    "object_id": _element("value", OBJECT_ID),
+    "bool": _element("value", True),
+    "datetime": _element("value", datetime.datetime(2020, 1, 1)),
+    "null": _element("value", None),
+    "regex": _element("value", Regex("^a.*b$", "im")),
+    "db_pointer": _raw(
+        "value", 0x0C, _string("database.collection") + OBJECT_ID.binary
+    ),
+    "code": _element("value", Code("function () { return 1; }")),
+    "symbol": _raw("value", 0x0E, _string("symbol")),
+    "code_with_scope": _element("value", Code("function () { return x; }", {"x": 1})),
+    "int32": _element("value", 42),
+    "timestamp": _element("value", Timestamp(1, 2)),
+    "int64": _element("value", Int64(2**40)),
+    "decimal128": _element("value", Decimal128("1.10")),
+    "min_key": _element("value", MinKey()),
+    "max_key": _element("value", MaxKey()),
+    "dbref": _element("value", DBRef("collection", OBJECT_ID)),
+}
+
+
+@pytest.mark.parametrize("kind", ELEMENTS)
+@pytest.mark.parametrize("milvus_first", [True, False])
+def test_read_field_matches_bson_decode(kind: str, milvus_first: bool):
+    elements = [_element("milvus_id", 123), ELEMENTS[kind], _element("after", "x")]
+    if not milvus_first:
+        elements[0], elements[1] = elements[1], elements[0]
+    raw = _document(*elements)
+
+    decoded = bson.decode(raw)
+    assert read_field(raw, "milvus_id") == decoded["milvus_id"] == 123
+    assert read_field(raw, "value") == decoded["value"]
+    assert read_field(raw, "after") == decoded["after"]
+
+
+def test_read_field_default():
+    raw = _document(_element("milvus_id", 1))
+    assert read_field(raw, "missing") is None
+    assert read_field(raw, "missing", 0) == 0
+    assert read_field(_document(), "milvus_id", -1) == -1
+
+
+def test_read_field_ignores_nested_names():
+    raw = _document(ELEMENTS["document"], _element("milvus_id", 5))
+    assert read_field(raw, "milvus_id") == 5
+    assert read_field(raw, "nested") is None
+
+
+def test_read_field_unknown_type():
+    raw = _document(_raw("value", 0x42, b""), _element("milvus_id", 5))
+    with pytest.raises(bson.InvalidBSON):
+        read_field(raw, "milvus_id")
+
+
+def test_milvus_id_of_and_attach():
+    raw = _document(_element("_id", OBJECT_ID), _element("milvus_id", "pk"))
+    document = JoinedRawDocument(raw)
+    assert milvus_id_of(document) == "pk"
+    assert milvus_id_of({"milvus_id": "pk"}) == "pk"
+
+    attach(document, {"id": "pk"})
+    assert document["milvus_data"] == {"id": "pk"}
+    assert document["_id"] == OBJECT_ID
+
+    plain = {}
+    attach(plain, {"id": "pk"})
+    assert plain == {"milvus_data": {"id": "pk"}}